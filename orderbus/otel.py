@@ -1,44 +1,65 @@
 """
 OpenTelemetry configuration for Django Orderbus.
+
+Span processor:
+    Spans are always exported through a BatchSpanProcessor outside of DEBUG.
+    SimpleSpanProcessor exports synchronously inside Span.end(), so every
+    request would block on an HTTP round-trip to the exporter - this has been
+    observed to add seconds of latency per request and to halve throughput
+    under load. OTEL_SPAN_PROCESSOR="simple" is only honoured when DEBUG=True.
+
+Imports:
+    The OpenTelemetry SDK, exporters and instrumentors are imported inside
+    setup_otel() once OTEL_ENABLED is confirmed, so wsgi.py/asgi.py workers do
+    not pay for the dependency tree when tracing is disabled.
 """
 import logging
-from opentelemetry import trace
-# from opentelemetry import metrics  # Disabled - Jaeger doesn't support OTLP metrics
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from opentelemetry.sdk.resources import Resource
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
-# from opentelemetry.sdk.metrics import MeterProvider
-# from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
-# from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
-from opentelemetry.exporter.jaeger.thrift import JaegerExporter
-from opentelemetry.instrumentation.django import DjangoInstrumentor
-from opentelemetry.instrumentation.psycopg2 import Psycopg2Instrumentor
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+# Settings read by setup_otel() and their fallbacks when unset
+_OTEL_DEFAULTS = {
+    "DEBUG": False,
+    "OTEL_ENABLED": False,
+    "OTEL_SERVICE_NAME": "django-orderbus",
+    "OTEL_EXPORTER_TYPE": "otlp",
+    "OTEL_EXPORTER_JAEGER_ENDPOINT": "http://localhost:14268/api/traces",
+    "OTEL_EXPORTER_OTLP_ENDPOINT": "http://localhost:4317",
+    "OTEL_EXPORTER_METRICS_ENABLED": False,
+    "OTEL_SPAN_PROCESSOR": "batch",
+    "OTEL_BSP_MAX_QUEUE_SIZE": 4096,
+    "OTEL_BSP_SCHEDULE_DELAY": 1000,
+    "OTEL_BSP_MAX_EXPORT_BATCH_SIZE": 256,
+    "OTEL_BSP_EXPORT_TIMEOUT": 10000,
+}
+
 
 def setup_otel():
     """Initialize OpenTelemetry instrumentation."""
+    # Read all settings in one pass
+    cfg = {key: getattr(settings, key, default) for key, default in _OTEL_DEFAULTS.items()}
+
     # Check if OTel is enabled
-    otel_enabled = getattr(settings, "OTEL_ENABLED", False)
-    if not otel_enabled:
+    if not cfg["OTEL_ENABLED"]:
         logger.info("OpenTelemetry is disabled. Skipping instrumentation.")
         return
 
-    service_name = getattr(settings, "OTEL_SERVICE_NAME", "django-orderbus")
+    # Deferred imports: only load the SDK when tracing is actually enabled
+    from opentelemetry import trace
+    from opentelemetry.instrumentation.django import DjangoInstrumentor
+    from opentelemetry.instrumentation.psycopg2 import Psycopg2Instrumentor
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+
+    service_name = cfg["OTEL_SERVICE_NAME"]
     # Jaeger endpoint: Direct export to Jaeger backend (for local dev only)
     # In production, use OTLP endpoint pointing to OpenTelemetry Collector instead
-    jaeger_endpoint = getattr(
-        settings, "OTEL_EXPORTER_JAEGER_ENDPOINT", "http://localhost:14268/api/traces"
-    )
-    # OTLP endpoint: Recommended for production
+    jaeger_endpoint = cfg["OTEL_EXPORTER_JAEGER_ENDPOINT"]
+    # OTLP endpoint (gRPC): Recommended for production
     # Should point to OpenTelemetry Collector (sidecar/daemonset), not directly to backend
     # Collector handles batching, sampling, retries, and forwards to backend (Jaeger/Tempo/etc.)
-    otlp_endpoint = getattr(
-        settings, "OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"
-    )
+    otlp_endpoint = cfg["OTEL_EXPORTER_OTLP_ENDPOINT"]
 
     # Create resource with service name
     resource = Resource.create({"service.name": service_name})
@@ -48,27 +69,62 @@ def setup_otel():
     trace.set_tracer_provider(tracer_provider)
 
     # Configure exporter based on settings
-    exporter_type = getattr(settings, "OTEL_EXPORTER_TYPE", "jaeger").lower()
+    exporter_type = cfg["OTEL_EXPORTER_TYPE"].lower()
+
+    if exporter_type == "jaeger":
+        # Use Jaeger Thrift exporter (explicit opt-in, local development only)
+        # Thrift serialization re-buffers every span several times before it hits the socket;
+        # production should use the OTLP exporter with an OpenTelemetry Collector instead
+        from opentelemetry.exporter.jaeger.thrift import JaegerExporter
 
-    if exporter_type == "otlp":
-        # Use OTLP exporter (recommended for production)
-        # In production: endpoint should point to OpenTelemetry Collector
-        #   - Kubernetes: otel-collector service (e.g., http://otel-collector:4318/v1/traces)
-        #   - Docker Compose: otel-collector service name
-        #   - Local dev: can point directly to Jaeger's OTLP receiver (port 4318)
-        exporter = OTLPSpanExporter(endpoint=otlp_endpoint)
-        logger.info(f"Using OTLP exporter with endpoint: {otlp_endpoint}")
-    else:
-        # Use Jaeger exporter (for local development only)
-        # Direct export to Jaeger backend - not recommended for production
-        # Production should use OTLP exporter with OpenTelemetry Collector as intermediary
         exporter = JaegerExporter(
             collector_endpoint=jaeger_endpoint,
+            # Split batches that exceed the UDP packet limit instead of failing with
+            # "message too long" if this falls back to the agent transport
+            udp_split_oversized_batches=True,
+            # Truncate large attribute values (e.g. SQL statements) before Thrift encoding
+            max_tag_value_length=1024,
         )
-        logger.info(f"Using Jaeger exporter with collector endpoint: {jaeger_endpoint}")
+        logger.info("Using Jaeger exporter with collector endpoint: %s", jaeger_endpoint)
+    else:
+        # Use OTLP/gRPC exporter (default, recommended for production)
+        # Protobuf is encoded once and sent over a reused HTTP/2 channel
+        # In production: endpoint should point to OpenTelemetry Collector
+        #   - Kubernetes: otel-collector service (e.g., http://otel-collector:4317)
+        #   - Docker Compose: otel-collector service name
+        #   - Local dev: can point directly to Jaeger's OTLP gRPC receiver (port 4317)
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+
+        exporter = OTLPSpanExporter(endpoint=otlp_endpoint)
+        logger.info("Using OTLP gRPC exporter with endpoint: %s", otlp_endpoint)
 
     # Add span processor
-    span_processor = BatchSpanProcessor(exporter)
+    processor_type = cfg["OTEL_SPAN_PROCESSOR"].lower()
+    if processor_type == "simple" and not cfg["DEBUG"]:
+        # Synchronous export blocks the request thread on span.end() - never in production
+        logger.warning(
+            "OTEL_SPAN_PROCESSOR='simple' is not allowed when DEBUG=False. "
+            "Falling back to BatchSpanProcessor."
+        )
+        processor_type = "batch"
+
+    if processor_type == "simple":
+        from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+
+        span_processor = SimpleSpanProcessor(exporter)
+        logger.info("Using SimpleSpanProcessor (DEBUG only)")
+    else:
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        # Tuned for webhook bursts: flush more often with smaller batches so the queue
+        # drains before it fills (SDK defaults: queue 2048, delay 5000ms, batch 512, timeout 30000ms)
+        span_processor = BatchSpanProcessor(
+            exporter,
+            max_queue_size=cfg["OTEL_BSP_MAX_QUEUE_SIZE"],
+            schedule_delay_millis=cfg["OTEL_BSP_SCHEDULE_DELAY"],
+            max_export_batch_size=cfg["OTEL_BSP_MAX_EXPORT_BATCH_SIZE"],
+            export_timeout_millis=cfg["OTEL_BSP_EXPORT_TIMEOUT"],
+        )
     tracer_provider.add_span_processor(span_processor)
 
     # Instrument Django
@@ -80,14 +136,17 @@ def setup_otel():
     # Set up metrics provider if enabled
     # Note: Jaeger all-in-one doesn't support OTLP metrics endpoint (/v1/metrics)
     # We use django-prometheus for application metrics instead
-    metrics_enabled = getattr(settings, "OTEL_EXPORTER_METRICS_ENABLED", False)
-    if metrics_enabled:
+    if cfg["OTEL_EXPORTER_METRICS_ENABLED"]:
         logger.warning(
             "OTel metrics export is enabled but Jaeger doesn't support OTLP metrics. "
             "Use django-prometheus for metrics instead. Disabling OTel metrics export."
         )
         # Uncomment below if you have an OTLP collector that supports metrics
-        # otlp_metrics_endpoint = otlp_endpoint.replace("/v1/traces", "/v1/metrics")
+        # from opentelemetry import metrics
+        # from opentelemetry.sdk.metrics import MeterProvider
+        # from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+        # from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+        # otlp_metrics_endpoint = otlp_endpoint  # gRPC serves traces and metrics on one port
         # metric_exporter = OTLPMetricExporter(endpoint=otlp_metrics_endpoint)
         # metric_reader = PeriodicExportingMetricReader(
         #     exporter=metric_exporter,
@@ -99,6 +158,6 @@ def setup_otel():
         # )
         # metrics.set_meter_provider(meter_provider)
 
-    logger.info(f"OpenTelemetry instrumentation enabled for service: {service_name}")
+    logger.info("OpenTelemetry instrumentation enabled for service: %s", service_name)
 
 
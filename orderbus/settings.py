@@ -94,6 +94,22 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Used for webhook replay short-circuits. Set REDIS_URL so all workers share one cache
+# (requires the `redis` package); otherwise each process gets its own local-memory cache.
+
+REDIS_URL = config('REDIS_URL', default=None)
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -147,7 +163,7 @@ REST_FRAMEWORK = {
         'rest_framework.renderers.JSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'orders.parsers.ORJSONParser',
     ],
 }
 
@@ -172,6 +188,10 @@ PUBSUB_SUBSCRIPTION_ORDER_CREATED = config(
     'PUBSUB_SUBSCRIPTION_ORDER_CREATED', default='order.created.local'
 )
 
+# Subscriber concurrency: max outstanding messages and callback worker threads
+PUBSUB_FLOW_MAX_MESSAGES = config('PUBSUB_FLOW_MAX_MESSAGES', default=500, cast=int)
+PUBSUB_WORKERS = config('PUBSUB_WORKERS', default=16, cast=int)
+
 
 # ==============================================================================
 # Webhook Configuration
@@ -184,6 +204,17 @@ WEBHOOK_OUTGOING_URL = config('WEBHOOK_OUTGOING_URL', default='https://example.c
 # If not set, signature verification is skipped (development only)
 WEBHOOK_SECRET = config('WEBHOOK_SECRET', default=None)
 
+# Separate key for the keyed-BLAKE2b signature (X-Webhook-Signature-Blake2) that internal,
+# non-Shopify senders may use. Unset (default) means that header is not accepted.
+INTERNAL_WEBHOOK_SECRET = config('INTERNAL_WEBHOOK_SECRET', default=None)
+
+# How long (seconds) an accepted delivery is remembered so identical retries skip processing.
+# Uses the default Django cache; configure CACHES with Redis/Memcached to share across workers.
+WEBHOOK_DELIVERY_CACHE_TTL = config('WEBHOOK_DELIVERY_CACHE_TTL', default=3600, cast=int)
+
+# How long (seconds) an idempotency_key/order_id -> order mapping is cached ahead of Postgres
+ORDER_CLAIM_CACHE_TTL = config('ORDER_CLAIM_CACHE_TTL', default=86400, cast=int)
+
 # ==============================================================================
 # Shopify Configuration
 # ==============================================================================
@@ -192,7 +223,7 @@ SHOPIFY_ADMIN_TOKEN = config('SHOPIFY_ADMIN_TOKEN', default=None)
 SHOPIFY_API_URL = config('SHOPIFY_API_URL', default=None)
 SHOPIFY_API_VERSION = config('SHOPIFY_API_VERSION', default='2024-10')
 SHOPIFY_API_SCOPES = config('SHOPIFY_API_SCOPES', default='read_orders,write_orders')
-SHOPIFY_TIMEOUT = config('SHOPIFY_TIMEOUT', default=30)
+SHOPIFY_TIMEOUT = config('SHOPIFY_TIMEOUT', default=30, cast=float)
 
 # ==============================================================================
 # OpenTelemetry Configuration
@@ -200,16 +231,21 @@ SHOPIFY_TIMEOUT = config('SHOPIFY_TIMEOUT', default=30)
 
 OTEL_ENABLED = config('OTEL_ENABLED', default=True, cast=bool)
 OTEL_SERVICE_NAME = config('OTEL_SERVICE_NAME', default='django-orderbus')
-OTEL_EXPORTER_TYPE = config('OTEL_EXPORTER_TYPE', default='jaeger')  # 'jaeger' or 'otlp'
+OTEL_EXPORTER_TYPE = config('OTEL_EXPORTER_TYPE', default='otlp')  # 'otlp' (gRPC) or 'jaeger'
 OTEL_EXPORTER_JAEGER_ENDPOINT = config(
     'OTEL_EXPORTER_JAEGER_ENDPOINT', default='http://localhost:14268/api/traces'
 )
-OTEL_EXPORTER_OTLP_ENDPOINT = config(
-    'OTEL_EXPORTER_OTLP_ENDPOINT', default='http://localhost:4318/v1/traces'
-)
+OTEL_EXPORTER_OTLP_ENDPOINT = config('OTEL_EXPORTER_OTLP_ENDPOINT', default='http://localhost:4317')
 OTEL_EXPORTER_METRICS_ENABLED = config(
     'OTEL_EXPORTER_METRICS_ENABLED', default=False, cast=bool
 )
+# Span processor: 'batch' (default) or 'simple' (synchronous export, only honoured when DEBUG=True)
+OTEL_SPAN_PROCESSOR = config('OTEL_SPAN_PROCESSOR', default='batch')
+# BatchSpanProcessor tuning (names mirror the standard OTEL_BSP_* env vars)
+OTEL_BSP_MAX_QUEUE_SIZE = config('OTEL_BSP_MAX_QUEUE_SIZE', default=4096, cast=int)
+OTEL_BSP_SCHEDULE_DELAY = config('OTEL_BSP_SCHEDULE_DELAY', default=1000, cast=int)  # ms
+OTEL_BSP_MAX_EXPORT_BATCH_SIZE = config('OTEL_BSP_MAX_EXPORT_BATCH_SIZE', default=256, cast=int)
+OTEL_BSP_EXPORT_TIMEOUT = config('OTEL_BSP_EXPORT_TIMEOUT', default=10000, cast=int)  # ms
 # Note: OTel metrics are exported via OTLP to Jaeger, not directly to Prometheus
 JAEGER_AGENT_HOST = config('JAEGER_AGENT_HOST', default='localhost')
 JAEGER_AGENT_PORT = config('JAEGER_AGENT_PORT', default=6831, cast=int)
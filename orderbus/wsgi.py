@@ -20,6 +20,6 @@ try:
 except Exception as e:
     import logging
     logger = logging.getLogger(__name__)
-    logger.warning(f"Failed to initialize OpenTelemetry: {e}")
+    logger.warning("Failed to initialize OpenTelemetry: %s", e)
 
 application = get_wsgi_application()
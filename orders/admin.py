@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Order, OrderItem
+from .models import Order, OrderItem, OutboxEvent
 
 
 class OrderItemInline(admin.TabularInline):
@@ -52,3 +52,16 @@ class OrderItemAdmin(admin.ModelAdmin):
     list_filter = ("order__created_at",)
     search_fields = ("sku", "name", "order__external_ref")
     readonly_fields = ("line_total",)
+
+    def get_queryset(self, request):
+        # list_display renders the parent order per row; join it instead of one query per row
+        return super().get_queryset(request).select_related("order")
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    """Admin interface for OutboxEvent model."""
+
+    list_display = ("id", "topic", "created_at", "delivered_at")
+    list_filter = ("topic", "delivered_at")
+    readonly_fields = ("created_at",)
@@ -1,14 +1,18 @@
 """
 Django management command to subscribe to order.created Pub/Sub events.
 """
-import json
 import logging
 import signal
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import orjson
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from google.cloud import pubsub_v1
+from google.cloud.pubsub_v1.subscriber.scheduler import ThreadScheduler
 from orders.pubsub_utils import get_subscription_path, setup_pubsub
-from orders.webhooks import send_order_created_webhook
+from orders.webhooks import get_http_client, send_order_created_webhook
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +59,23 @@ class Command(BaseCommand):
         self.subscriber = pubsub_v1.SubscriberClient()
 
         message_count = 0
+        # Callbacks run concurrently on the scheduler's thread pool
+        count_lock = threading.Lock()
+
+        # Flow control bounds how many messages are outstanding at once; the thread pool
+        # lets that many egress webhooks run in parallel instead of one at a time
+        flow_control = pubsub_v1.types.FlowControl(
+            max_messages=getattr(settings, "PUBSUB_FLOW_MAX_MESSAGES", 500),
+            max_bytes=50 * 1024 * 1024,
+        )
+        workers = getattr(settings, "PUBSUB_WORKERS", 16)
+        scheduler = ThreadScheduler(
+            executor=ThreadPoolExecutor(max_workers=workers, thread_name_prefix="order-created")
+        )
+
+        # Create the shared egress client up front; its pool is sized to PUBSUB_WORKERS so
+        # every worker reuses a keep-alive connection (closed at exit by webhooks.py)
+        get_http_client()
 
         def callback(message):
             """Process incoming Pub/Sub message."""
@@ -62,13 +83,13 @@ class Command(BaseCommand):
 
             try:
                 # Parse message data
-                event_data = json.loads(message.data.decode("utf-8"))
+                event_data = orjson.loads(message.data)
                 order_id = event_data.get("order_id", "unknown")
 
                 self.stdout.write(
                     self.style.SUCCESS(f"Received order.created event for: {order_id}")
                 )
-                logger.info(f"Processing Pub/Sub message: {event_data}")
+                logger.info("Processing Pub/Sub message: %s", event_data)
 
                 # Send egress webhook
                 success = send_order_created_webhook(event_data)
@@ -79,7 +100,8 @@ class Command(BaseCommand):
                     self.stdout.write(
                         self.style.SUCCESS(f"✓ Sent egress webhook for order: {order_id}")
                     )
-                    message_count += 1
+                    with count_lock:
+                        message_count += 1
                 else:
                     # Nack message on failure (will be redelivered)
                     message.nack()
@@ -96,21 +118,26 @@ class Command(BaseCommand):
                     )
                     self._shutdown()
 
-            except json.JSONDecodeError as e:
-                logger.error(f"Invalid JSON in Pub/Sub message: {e}")
+            except orjson.JSONDecodeError as e:
+                logger.error("Invalid JSON in Pub/Sub message: %s", e)
                 message.ack()  # Ack to prevent infinite retries
             except Exception as e:
-                logger.error(f"Error processing message: {e}", exc_info=True)
+                logger.error("Error processing message: %s", e, exc_info=True)
                 message.nack()
 
         try:
             # Start streaming pull
             self.streaming_pull_future = self.subscriber.subscribe(
-                subscription_path, callback=callback
+                subscription_path,
+                callback=callback,
+                flow_control=flow_control,
+                scheduler=scheduler,
             )
 
             self.stdout.write(
-                self.style.SUCCESS(f"Listening for messages on {subscription_path}...")
+                self.style.SUCCESS(
+                    f"Listening for messages on {subscription_path} ({workers} workers)..."
+                )
             )
             self.stdout.write(self.style.WARNING("Press Ctrl+C to stop"))
 
@@ -118,7 +145,7 @@ class Command(BaseCommand):
             self.streaming_pull_future.result()
 
         except Exception as e:
-            logger.error(f"Subscriber error: {e}", exc_info=True)
+            logger.error("Subscriber error: %s", e, exc_info=True)
             self.stdout.write(self.style.ERROR(f"Subscriber error: {e}"))
             self._shutdown()
 
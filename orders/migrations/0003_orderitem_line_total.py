@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-15 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0002_order_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="orderitem",
+            name="line_total",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=0,
+                editable=False,
+                help_text="quantity * unit_price, stored so reads don't recompute it",
+                max_digits=12,
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunSQL(
+            "UPDATE orders_orderitem SET line_total = quantity * unit_price",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
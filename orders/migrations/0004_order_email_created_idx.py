@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-15 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0003_orderitem_line_total"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["customer_email", "-created_at"], name="order_email_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-15 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0004_order_email_created_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("topic", models.CharField(help_text="Pub/Sub topic ID", max_length=255)),
+                ("payload_json", models.TextField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("delivered_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Outbox Event",
+                "verbose_name_plural": "Outbox Events",
+                "indexes": [
+                    models.Index(
+                        fields=["delivered_at", "created_at"], name="outbox_pending_idx"
+                    )
+                ],
+            },
+        ),
+    ]
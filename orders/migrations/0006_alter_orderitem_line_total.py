@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-15 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0005_outboxevent"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="orderitem",
+            name="line_total",
+            field=models.DecimalField(
+                decimal_places=2,
+                editable=False,
+                help_text="quantity * unit_price, stored so reads don't recompute it",
+                max_digits=20,
+            ),
+        ),
+    ]
@@ -25,6 +25,10 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Customer lookups (admin search) already come back newest-first
+            models.Index(fields=["customer_email", "-created_at"], name="order_email_created_idx"),
+        ]
         verbose_name = "Order"
         verbose_name_plural = "Orders"
 
@@ -42,6 +46,13 @@ class OrderItem(models.Model):
     name = models.CharField(max_length=255)
     quantity = models.PositiveIntegerField()
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    line_total = models.DecimalField(
+        # Largest quantity (10 digits) times the largest unit_price (8 + 2 digits)
+        max_digits=20,
+        decimal_places=2,
+        editable=False,
+        help_text="quantity * unit_price, stored so reads don't recompute it",
+    )
 
     class Meta:
         verbose_name = "Order Item"
@@ -50,9 +61,37 @@ class OrderItem(models.Model):
     def __str__(self):
         return f"{self.quantity}x {self.name} (SKU: {self.sku})"
 
-    @property
-    def line_total(self):
+    def calculate_line_total(self):
         """Calculate total price for this line item."""
         if self.quantity is not None and self.unit_price is not None:
             return self.quantity * self.unit_price
         return None
+
+    def save(self, *args, **kwargs):
+        self.line_total = self.calculate_line_total()
+        super().save(*args, **kwargs)
+
+
+class OutboxEvent(models.Model):
+    """
+    An event waiting to be published to Pub/Sub (transactional outbox).
+
+    Rows are written in the same transaction as the order and published by the
+    drain_outbox management command, so delivery is at-least-once and the webhook
+    never waits on Pub/Sub.
+    """
+
+    topic = models.CharField(max_length=255, help_text="Pub/Sub topic ID")
+    payload_json = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["delivered_at", "created_at"], name="outbox_pending_idx"),
+        ]
+        verbose_name = "Outbox Event"
+        verbose_name_plural = "Outbox Events"
+
+    def __str__(self):
+        return f"{self.topic} #{self.pk} ({'delivered' if self.delivered_at else 'pending'})"
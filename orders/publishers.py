@@ -1,60 +1,31 @@
 """
-Google Pub/Sub publisher for order events.
+Order event payloads and Pub/Sub publish metrics.
+
+Events are written to the outbox (see OutboxEvent) and published by drain_outbox.
 """
-import json
-import logging
-from google.cloud import pubsub_v1
-from django.conf import settings
-from .pubsub_utils import get_topic_path, ensure_topic_exists
+from prometheus_client import Counter
 
-logger = logging.getLogger(__name__)
+PUBLISH_FAILURES = Counter(
+    "orderbus_pubsub_publish_failures_total",
+    "Outbox events whose Pub/Sub publish failed (left pending for the next pass)",
+    ["topic"],
+)
 
 
-def publish_order_created(order):
+def build_order_created_event(order):
     """
-    Publish an order.created event to Google Pub/Sub.
+    Build the order.created event payload for an order.
 
     Args:
-        order: Order instance to publish
+        order: Order instance
 
-    Raises:
-        Exception: If publishing fails
+    Returns:
+        dict: Event data (serialize with orjson)
     """
-    # Prepare event payload
-    event_data = {
+    return {
         "event": "order.created",
         "order_id": order.external_ref,
         "customer_name": order.customer_name,
-        "total": str(order.total),
-        "created_at": order.created_at.isoformat(),
+        "total": str(order.total),  # orjson has no native Decimal support
+        "created_at": order.created_at,  # orjson emits RFC 3339 natively
     }
-
-    logger.info(f"Publishing order.created event for: {order.external_ref}")
-
-    try:
-        # Ensure topic exists (idempotent)
-        topic_path = ensure_topic_exists()
-
-        # Create publisher client
-        publisher = pubsub_v1.PublisherClient()
-
-        # Convert event data to JSON bytes
-        message_data = json.dumps(event_data).encode("utf-8")
-
-        # Publish message
-        future = publisher.publish(topic_path, message_data)
-
-        # Wait for publish confirmation (with timeout)
-        message_id = future.result(timeout=2.0)
-
-        logger.info(
-            f"Published order.created event to Pub/Sub. Message ID: {message_id}, Order: {order.external_ref}"
-        )
-
-        return message_id
-
-    except Exception as e:
-        logger.error(f"Failed to publish order.created event for {order.external_ref}: {e}")
-        raise
-
-
@@ -1,47 +1,94 @@
 """
 Google Pub/Sub utilities for topic and subscription management.
 """
+import atexit
 import logging
+import threading
 from google.cloud import pubsub_v1
 from google.api_core.exceptions import AlreadyExists
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+# Shared publisher client: one gRPC channel per process instead of one per publish
+_publisher = None
+_publisher_lock = threading.Lock()
 
-def get_topic_path():
-    """Get the full topic path."""
-    publisher = pubsub_v1.PublisherClient()
-    return publisher.topic_path(settings.PUBSUB_PROJECT_ID, settings.PUBSUB_TOPIC_ORDER_CREATED)
+# Topics/subscriptions confirmed to exist in this process (skip the admin RPC after first success)
+_topic_ready: set[str] = set()
+_subscription_ready: set[str] = set()
+
+
+def get_publisher():
+    """
+    Get the process-wide Pub/Sub publisher client, creating it on first use.
+
+    Returns:
+        pubsub_v1.PublisherClient: Shared publisher client
+    """
+    global _publisher
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                # Let the client batch messages in its background thread instead of
+                # sending one RPC per publish
+                _publisher = pubsub_v1.PublisherClient(
+                    batch_settings=pubsub_v1.types.BatchSettings(
+                        max_messages=100,
+                        max_bytes=1024 * 1024,
+                        max_latency=0.05,
+                    ),
+                    publisher_options=pubsub_v1.types.PublisherOptions(
+                        enable_message_ordering=False,
+                    ),
+                )
+                # Flush any partially filled batch on worker shutdown
+                atexit.register(_publisher.stop)
+    return _publisher
+
+
+def get_topic_path(topic_id=None):
+    """Get the full topic path (defaults to the order.created topic)."""
+    topic_id = topic_id or settings.PUBSUB_TOPIC_ORDER_CREATED
+    # Same format as PublisherClient.topic_path(), without needing a client
+    return f"projects/{settings.PUBSUB_PROJECT_ID}/topics/{topic_id}"
 
 
 def get_subscription_path():
     """Get the full subscription path."""
-    subscriber = pubsub_v1.SubscriberClient()
-    return subscriber.subscription_path(
-        settings.PUBSUB_PROJECT_ID, settings.PUBSUB_SUBSCRIPTION_ORDER_CREATED
+    # Same format as SubscriberClient.subscription_path(), without needing a client
+    return (
+        f"projects/{settings.PUBSUB_PROJECT_ID}"
+        f"/subscriptions/{settings.PUBSUB_SUBSCRIPTION_ORDER_CREATED}"
     )
 
 
-def ensure_topic_exists():
+def ensure_topic_exists(topic_id=None):
     """
     Ensure the Pub/Sub topic exists, create if it doesn't.
 
+    Args:
+        topic_id: Topic ID (defaults to settings.PUBSUB_TOPIC_ORDER_CREATED)
+
     Returns:
         str: Topic path
     """
-    publisher = pubsub_v1.PublisherClient()
-    topic_path = get_topic_path()
+    topic_path = get_topic_path(topic_id)
+    if topic_path in _topic_ready:
+        return topic_path
+
+    publisher = get_publisher()
 
     try:
         publisher.create_topic(request={"name": topic_path})
-        logger.info(f"Created Pub/Sub topic: {topic_path}")
+        logger.info("Created Pub/Sub topic: %s", topic_path)
     except AlreadyExists:
-        logger.debug(f"Pub/Sub topic already exists: {topic_path}")
+        logger.debug("Pub/Sub topic already exists: %s", topic_path)
     except Exception as e:
-        logger.error(f"Error creating topic {topic_path}: {e}")
+        logger.error("Error creating topic %s: %s", topic_path, e)
         raise
 
+    _topic_ready.add(topic_path)
     return topic_path
 
 
@@ -52,19 +99,23 @@ def ensure_subscription_exists():
     Returns:
         str: Subscription path
     """
+    subscription_path = get_subscription_path()
+    if subscription_path in _subscription_ready:
+        return subscription_path
+
     subscriber = pubsub_v1.SubscriberClient()
     topic_path = get_topic_path()
-    subscription_path = get_subscription_path()
 
     try:
         subscriber.create_subscription(request={"name": subscription_path, "topic": topic_path})
-        logger.info(f"Created Pub/Sub subscription: {subscription_path}")
+        logger.info("Created Pub/Sub subscription: %s", subscription_path)
     except AlreadyExists:
-        logger.debug(f"Pub/Sub subscription already exists: {subscription_path}")
+        logger.debug("Pub/Sub subscription already exists: %s", subscription_path)
     except Exception as e:
-        logger.error(f"Error creating subscription {subscription_path}: {e}")
+        logger.error("Error creating subscription %s: %s", subscription_path, e)
         raise
 
+    _subscription_ready.add(subscription_path)
     return subscription_path
 
 
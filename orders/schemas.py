@@ -0,0 +1,175 @@
+"""
+msgspec schemas for incoming webhook payloads.
+
+This is the single source of truth for validating the order webhook. Decoding the raw
+request body straight into these structs validates it during the JSON parse, so the
+webhook path never builds an intermediate dict or runs DRF's field-by-field validation.
+
+The rules match what the DRF serializer it replaced accepted, so existing senders keep
+working: decoding is lax (e.g. "quantity": "2" is accepted), string fields also take
+numbers, strings are trimmed and may not be blank, and amounts are quantized to two
+decimal places. schema_errors() reports failures in DRF's {"field": [...]} shape.
+"""
+import re
+from decimal import Decimal
+from typing import Annotated
+
+import msgspec
+
+_CENT = Decimal("0.01")
+# Upper bound of OrderItem.quantity (PositiveIntegerField)
+_MAX_QUANTITY = 2147483647
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+# Like serializers.CharField, string fields accept JSON numbers and store str(value)
+Text = str | int | float
+
+
+def _clean_str(field, value, max_length=None, allow_blank=False):
+    """Coerce, trim and length-check a string like serializers.CharField does."""
+    value = str(value).strip()
+    if not value and not allow_blank:
+        raise ValueError(f"`{field}` may not be blank")
+    if max_length is not None and len(value) > max_length:
+        raise ValueError(f"`{field}` must have no more than {max_length} characters")
+    return value
+
+
+def _clean_money(field, value):
+    """
+    Enforce DecimalField(max_digits=10, decimal_places=2) on a decoded amount.
+
+    Returns the value quantized to cents, so 350 is stored and published as 350.00.
+    """
+    if not value.is_finite():
+        raise ValueError(f"`{field}` must be a finite number")
+    sign, digits, exponent = value.as_tuple()
+    if exponent < -2:
+        raise ValueError(f"`{field}` must have no more than 2 decimal places")
+    if len(digits) + max(exponent, 0) > 10:
+        raise ValueError(f"`{field}` must have no more than 10 digits in total")
+    return value.quantize(_CENT)
+
+
+class OrderItemPayload(msgspec.Struct):
+    """A line item in the webhook payload."""
+
+    sku: Text
+    name: Text
+    quantity: Annotated[int, msgspec.Meta(ge=1, le=_MAX_QUANTITY)]
+    unit_price: Decimal
+
+    def __post_init__(self):
+        self.sku = _clean_str("sku", self.sku, max_length=100)
+        self.name = _clean_str("name", self.name, max_length=255)
+        self.unit_price = _clean_money("unit_price", self.unit_price)
+
+
+class CustomerPayload(msgspec.Struct):
+    """The nested customer object in the webhook payload."""
+
+    name: Text
+    email: str
+
+    def __post_init__(self):
+        self.name = _clean_str("name", self.name, max_length=255)
+        self.email = _clean_str("email", self.email, max_length=254)
+        if not _EMAIL_RE.match(self.email):
+            raise ValueError("`email` must be a valid email address")
+
+
+class OrderWebhookPayload(msgspec.Struct):
+    """
+    Incoming order webhook payload (see orders.views.order_webhook for an example).
+    """
+
+    order_id: Text
+    customer: CustomerPayload
+    items: Annotated[list[OrderItemPayload], msgspec.Meta(min_length=1)]
+    shipping_address: Text
+    total: Decimal
+    idempotency_key: Text | None = None
+
+    def __post_init__(self):
+        self.order_id = _clean_str("order_id", self.order_id, max_length=255)
+        self.shipping_address = _clean_str("shipping_address", self.shipping_address)
+        self.total = _clean_money("total", self.total)
+        if self.idempotency_key is not None:
+            self.idempotency_key = _clean_str(
+                "idempotency_key", self.idempotency_key, max_length=255, allow_blank=True
+            )
+
+    def to_validated_data(self):
+        """
+        Convert to the validated_data dict consumed by create_order.
+
+        Returns:
+            dict: Data accepted by orders.serializers.create_order
+        """
+        return {
+            "external_ref": self.order_id,
+            "idempotency_key": self.idempotency_key,
+            "customer": {"name": self.customer.name, "email": self.customer.email},
+            "items": [msgspec.structs.asdict(item) for item in self.items],
+            "shipping_address": self.shipping_address,
+            "total": self.total,
+        }
+
+
+# strict=False accepts numeric strings for numbers, as DRF's fields did
+_decoder = msgspec.json.Decoder(OrderWebhookPayload, strict=False)
+
+# "<message> - at `$.items[0].quantity`"; the location is omitted for the root object
+_ERROR_LOCATION_RE = re.compile(r"^(?P<message>.*?)(?: - at `\$(?P<path>[^`]*)`)?$", re.S)
+_PATH_PART_RE = re.compile(r"\.(\w+)|\[(\d+)\]")
+# Errors raised for a whole struct that name the offending field themselves
+_FIELD_IN_MESSAGE_RE = re.compile(r"^(?:Object missing required field )?`(\w+)`")
+
+
+def decode_order_webhook(body):
+    """
+    Parse and validate a raw webhook body in a single pass.
+
+    Args:
+        body: Raw request body (bytes)
+
+    Returns:
+        OrderWebhookPayload: Validated payload
+
+    Raises:
+        msgspec.DecodeError: Body is not valid JSON
+        msgspec.ValidationError: Body does not match the schema (a DecodeError subclass)
+    """
+    return _decoder.decode(body)
+
+
+def schema_errors(exc):
+    """
+    Convert a msgspec.ValidationError into DRF's serializer.errors shape.
+
+    For example, a bad quantity on the second item becomes
+    {"items": [{}, {"quantity": ["Expected `int`, got `str`"]}]}.
+
+    Args:
+        exc: msgspec.ValidationError raised by decode_order_webhook
+
+    Returns:
+        dict: Field name -> list of messages (nested for customer/items)
+    """
+    match = _ERROR_LOCATION_RE.match(str(exc))
+    message = match["message"]
+    path = [name or int(index) for name, index in _PATH_PART_RE.findall(match["path"] or "")]
+
+    field = _FIELD_IN_MESSAGE_RE.match(message)
+    if field and (not path or path[-1] != field[1]):
+        path.append(field[1])
+    if not path:
+        return {"non_field_errors": [message]}
+
+    errors = [message]
+    for part in reversed(path):
+        if isinstance(part, int):
+            errors = [{} for _ in range(part)] + [errors]
+        else:
+            errors = {part: errors}
+    return errors
@@ -1,14 +1,47 @@
 """
 Webhook security utilities including HMAC signature verification.
 """
-import hmac
+import base64
+import binascii
+import functools
 import hashlib
+import hmac
 import logging
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=4)
+def _get_hmac_template(secret):
+    """
+    Return a pre-keyed HMAC-SHA256 object for the given secret.
+
+    Callers must ``.copy()`` it before ``update()`` so the cached key schedule
+    (inner/outer pad derivation) is reused instead of rebuilt per request.
+    """
+    # String digestmod dispatches straight to OpenSSL's native HMAC implementation
+    return hmac.new(secret.encode("utf-8"), b"", "sha256")
+
+
+def _hmac_sha256(secret, payload):
+    """Return an HMAC-SHA256 object over payload, cloned from the cached template."""
+    mac = _get_hmac_template(secret).copy()
+    mac.update(payload)
+    return mac
+
+
+def _blake2b_mac(secret, payload):
+    """
+    Return a keyed BLAKE2b-256 digest of payload.
+
+    A single keyed-hash call (no inner/outer HMAC passes); only for internal senders
+    that opt in via X-Webhook-Signature-Blake2, keyed with INTERNAL_WEBHOOK_SECRET.
+    Secrets longer than 64 bytes raise ValueError, as BLAKE2b keys are capped at that size.
+    """
+    return hashlib.blake2b(payload, key=secret.encode("utf-8"), digest_size=32).digest()
+
+
 def verify_webhook_signature(request_body, signature_header, secret=None):
     """
     Verify HMAC-SHA256 signature for incoming webhooks.
@@ -37,23 +70,22 @@ def verify_webhook_signature(request_body, signature_header, secret=None):
 
     try:
         # Calculate expected signature
-        expected_signature = hmac.new(
-            secret.encode("utf-8"), request_body, hashlib.sha256
-        ).hexdigest()
+        expected_signature = _hmac_sha256(secret, request_body).hexdigest()
 
         # Compare signatures (constant-time comparison to prevent timing attacks)
         is_valid = hmac.compare_digest(expected_signature, signature_header)
 
         if not is_valid:
             logger.warning(
-                f"Invalid webhook signature. Expected: {expected_signature[:10]}..., "
-                f"Got: {signature_header[:10]}..."
+                "Invalid webhook signature. Expected: %s..., Got: %s...",
+                expected_signature[:10],
+                signature_header[:10],
             )
 
         return is_valid
 
     except Exception as e:
-        logger.error(f"Error verifying webhook signature: {e}", exc_info=True)
+        logger.error("Error verifying webhook signature: %s", e, exc_info=True)
         return False
 
 
@@ -71,8 +103,6 @@ def verify_shopify_webhook(request_body, signature_header, secret=None):
     Returns:
         bool: True if signature is valid
     """
-    import base64
-
     if not signature_header:
         return False
 
@@ -85,9 +115,9 @@ def verify_shopify_webhook(request_body, signature_header, secret=None):
 
     try:
         # Calculate expected signature
-        expected_hmac = base64.b64encode(
-            hmac.new(secret.encode("utf-8"), request_body, hashlib.sha256).digest()
-        ).decode()
+        expected_hmac = binascii.b2a_base64(
+            _hmac_sha256(secret, request_body).digest(), newline=False
+        ).decode("ascii")
 
         # Compare signatures
         is_valid = hmac.compare_digest(expected_hmac, signature_header)
@@ -98,9 +128,71 @@ def verify_shopify_webhook(request_body, signature_header, secret=None):
         return is_valid
 
     except Exception as e:
-        logger.error(f"Error verifying Shopify webhook: {e}", exc_info=True)
+        logger.error("Error verifying Shopify webhook: %s", e, exc_info=True)
+        return False
+
+
+def verify_request_signature(
+    request_body, shopify_signature=None, hex_signature=None, blake2_signature=None, secret=None
+):
+    """
+    Verify an ingress webhook against whichever signature header it carries.
+
+    The MAC is computed once and the decoded header is compared as raw digest bytes,
+    so every format goes through a single fixed-length constant-time comparison.
+
+    Args:
+        request_body: Raw request body (bytes)
+        shopify_signature: Base64 signature from X-Shopify-Hmac-SHA256 (takes precedence)
+        hex_signature: Hex signature from X-Webhook-Signature
+        blake2_signature: Hex keyed-BLAKE2b signature from X-Webhook-Signature-Blake2
+            (internal senders only; ignored unless settings.INTERNAL_WEBHOOK_SECRET is
+            set, and checked only when neither HMAC header is present)
+        secret: Webhook secret key (defaults to settings.WEBHOOK_SECRET)
+
+    Returns:
+        bool: True if signature is valid, False otherwise
+    """
+    if secret is None:
+        secret = getattr(settings, "WEBHOOK_SECRET", None)
+
+    if not secret:
+        logger.warning("WEBHOOK_SECRET not configured - skipping signature verification")
+        return True  # Allow in development if not configured
+
+    internal_secret = getattr(settings, "INTERNAL_WEBHOOK_SECRET", None)
+    use_blake2 = False
+    try:
+        if shopify_signature:
+            provided = base64.b64decode(shopify_signature, validate=True)
+        elif hex_signature:
+            provided = bytes.fromhex(hex_signature)
+        elif blake2_signature and internal_secret:
+            provided = bytes.fromhex(blake2_signature)
+            use_blake2 = True
+        else:
+            logger.warning("No signature header provided")
+            return False
+    except (binascii.Error, ValueError):
+        logger.warning("Malformed webhook signature header")
         return False
 
+    if use_blake2:
+        try:
+            expected = _blake2b_mac(internal_secret, request_body)
+        except ValueError:
+            logger.error("INTERNAL_WEBHOOK_SECRET is too long to use as a BLAKE2b key")
+            return False
+    else:
+        expected = _hmac_sha256(secret, request_body).digest()
+
+    is_valid = hmac.compare_digest(expected, provided)
+
+    if not is_valid:
+        logger.warning("Invalid webhook signature")
+
+    return is_valid
+
 
 def generate_webhook_signature(payload, secret):
     """
@@ -116,7 +208,7 @@ def generate_webhook_signature(payload, secret):
     if isinstance(payload, str):
         payload = payload.encode("utf-8")
 
-    signature = hmac.new(secret.encode("utf-8"), payload, hashlib.sha256).hexdigest()
+    signature = _hmac_sha256(secret, payload).hexdigest()
 
     return signature
 
@@ -1,7 +1,36 @@
-import requests
+import asyncio
+import logging
+import threading
+import httpx
 from django.conf import settings
 
+logger = logging.getLogger(__name__)
+
+# Retry policy for transient Shopify failures. A 429 means the call was rejected, so it is
+# always safe to retry; a 5xx may arrive after Shopify applied the call, so those are only
+# retried for idempotent methods (retrying a POST could create a duplicate fulfillment)
+THROTTLED_STATUS = 429
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 0.3
+
+# Client-side throttling against Shopify's leaky bucket (REST Admin API: 40 requests/app/store)
+CALL_LIMIT_BUCKET = 40
+CALL_LIMIT_THRESHOLD = 0.9  # Slow down once the bucket is this full
+CALL_LIMIT_PAUSE = 0.5  # Seconds to pause when over the threshold
+
 class ShopifyClient:
+    """
+    Async Shopify Admin API client.
+
+    Backed by a pooled HTTP/2 httpx.AsyncClient, so independent calls can be fanned out
+    concurrently over one connection:
+
+        async with ShopifyClient() as client:
+            results = await asyncio.gather(*(client.get_fulfillments(oid) for oid in order_ids))
+    """
+
     def __init__(self, shop_url: str = None, api_key: str = None):
         self.shop_url = shop_url or settings.SHOPIFY_SHOP_URL
         self.api_key = api_key or settings.SHOPIFY_ADMIN_TOKEN
@@ -9,52 +38,121 @@ class ShopifyClient:
         if not self.shop_url or not self.api_key:
             raise ValueError('Shop URL and API key are required')
 
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Content-Type': 'application/json',
-            'X-Shopify-Access-Token': self.api_key
-        })
         self.api_version = settings.SHOPIFY_API_VERSION
         self.base_url = f'{self.shop_url}/admin/api/{self.api_version}'
         self.timeout = settings.SHOPIFY_TIMEOUT
         self.api_scopes = settings.SHOPIFY_API_SCOPES
 
-    def _request(self, method: str, endpoint: str, **kwargs) -> dict:
+        # Pre-formatted absolute URL templates for the hottest endpoints; httpx sends
+        # absolute URLs as-is instead of re-merging each path with base_url
+        self._order_url = f'{self.base_url}/orders/{{}}.json'.format
+        self._fulfillments_url = f'{self.base_url}/orders/{{}}/fulfillments.json'.format
+        self._fulfillment_url = f'{self.base_url}/orders/{{}}/fulfillments/{{}}.json'.format
+
+        # Keep concurrent in-flight calls under the shop's bucket size
+        self._bucket = asyncio.Semaphore(CALL_LIMIT_BUCKET - 1)
+
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            headers={
+                'Content-Type': 'application/json',
+                'X-Shopify-Access-Token': self.api_key
+            },
+            # Pool/HTTP2 settings live on the transport when one is supplied; retries
+            # re-establish dropped connections instead of failing the call
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=3,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            ),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    @staticmethod
+    def _should_retry(method: str, status_code: int) -> bool:
+        if status_code == THROTTLED_STATUS:
+            return True
+        return status_code in RETRY_STATUSES and method.upper() in IDEMPOTENT_METHODS
+
+    @staticmethod
+    def _retry_delay(response: httpx.Response, attempt: int) -> float:
+        # Honour Retry-After (Shopify sends seconds, e.g. "2.0"), else exponential backoff
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return BACKOFF_FACTOR * (2 ** attempt)
+
+    @staticmethod
+    async def _throttle(response: httpx.Response):
+        # X-Shopify-Shop-Api-Call-Limit: "<used>/<bucket size>", e.g. "32/40"
+        call_limit = response.headers.get('X-Shopify-Shop-Api-Call-Limit')
+        if not call_limit:
+            return
         try:
-            response = self.session.request(
-                method,
-                f'{self.base_url}{endpoint}',
-                timeout=self.timeout,
-                **kwargs
-            )
+            used, cap = (int(part) for part in call_limit.split('/'))
+        except ValueError:
+            return
+        if cap and used / cap > CALL_LIMIT_THRESHOLD:
+            await asyncio.sleep(CALL_LIMIT_PAUSE)
+
+    async def _request(self, method: str, endpoint: str, **kwargs) -> dict:
+        # endpoint: path relative to base_url, or a pre-formatted absolute URL
+        try:
+            for attempt in range(MAX_RETRIES + 1):
+                async with self._bucket:
+                    response = await self._client.request(method, endpoint, **kwargs)
+                    await self._throttle(response)
+                if not self._should_retry(method, response.status_code) or attempt == MAX_RETRIES:
+                    break
+                delay = self._retry_delay(response, attempt)
+                logger.warning(
+                    'Shopify %s %s returned %s, retrying in %.1fs (%s/%s)',
+                    method, endpoint, response.status_code, delay, attempt + 1, MAX_RETRIES
+                )
+                await asyncio.sleep(delay)
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.RequestException as e:
-            raise requests.exceptions.RequestException(f'Error requesting Shopify API: {e}')
+        except httpx.TimeoutException as e:
+            logger.error('Shopify %s %s timed out after %ss', method, endpoint, self.timeout)
+            raise httpx.TimeoutException(f'Timed out requesting Shopify API {endpoint}: {e}') from e
+        except httpx.HTTPError as e:
+            raise httpx.HTTPError(f'Error requesting Shopify API: {e}') from e
 
-    def get_order(self, order_id: str) -> dict: # Get an order by ID
-        return self._request('GET', f'/orders/{order_id}.json')
+    async def get_order(self, order_id: str) -> dict: # Get an order by ID
+        return await self._request('GET', self._order_url(order_id))
 
-    def create_order(self, order_data: dict) -> dict: # Create a new order
-        return self._request('POST', '/orders.json', json=order_data)
+    async def create_order(self, order_data: dict) -> dict: # Create a new order
+        return await self._request('POST', '/orders.json', json=order_data)
 
-    def get_fulfillment(self, order_id: str, fulfillment_id: str) -> dict: # Get a fulfillment by ID
-        return self._request('GET', f'/orders/{order_id}/fulfillments/{fulfillment_id}.json')
+    async def get_fulfillment(self, order_id: str, fulfillment_id: str) -> dict: # Get a fulfillment by ID
+        return await self._request('GET', self._fulfillment_url(order_id, fulfillment_id))
 
-    def get_fulfillments(self, order_id: str) -> list:
-        return self._request('GET', f'/orders/{order_id}/fulfillments.json')
+    async def get_fulfillments(self, order_id: str) -> list:
+        return await self._request('GET', self._fulfillments_url(order_id))
 
-    def create_fulfillment(self, order_id: str, fulfillment_data: dict) -> dict: # Create a new fulfillment for an order
-        return self._request('POST', f'/orders/{order_id}/fulfillments.json', json=fulfillment_data)
+    async def create_fulfillment(self, order_id: str, fulfillment_data: dict) -> dict: # Create a new fulfillment for an order
+        return await self._request('POST', self._fulfillments_url(order_id), json=fulfillment_data)
 
-    def update_fulfillment(self, order_id: str, fulfillment_id: str, fulfillment_data: dict) -> dict:
-        return self._request('PUT', f'/orders/{order_id}/fulfillments/{fulfillment_id}.json', json=fulfillment_data)
+    async def update_fulfillment(self, order_id: str, fulfillment_id: str, fulfillment_data: dict) -> dict:
+        return await self._request('PUT', self._fulfillment_url(order_id, fulfillment_id), json=fulfillment_data)
 
-    def cancel_fulfillment(self, order_id: str, fulfillment_id: str) -> dict: # Cancel a fulfillment for an order
-        return self._request('DELETE', f'/orders/{order_id}/fulfillments/{fulfillment_id}.json')
+    async def cancel_fulfillment(self, order_id: str, fulfillment_id: str) -> dict: # Cancel a fulfillment for an order
+        return await self._request('DELETE', self._fulfillment_url(order_id, fulfillment_id))
 
     # Inventory Level Methods
-    def get_inventory_levels(self, inventory_item_ids: str = None, location_ids: str = None, limit: int = 50, updated_at_min: str = None) -> dict:
+    async def get_inventory_levels(self, inventory_item_ids: str = None, location_ids: str = None, limit: int = 50, updated_at_min: str = None) -> dict:
         """Get inventory levels. Pass comma-separated IDs for inventory_item_ids and/or location_ids."""
         params = {}
         if inventory_item_ids:
@@ -65,66 +163,96 @@ class ShopifyClient:
             params['limit'] = limit
         if updated_at_min:
             params['updated_at_min'] = updated_at_min
-        return self._request('GET', '/inventory_levels.json', params=params)
+        return await self._request('GET', '/inventory_levels.json', params=params)
 
-    def set_inventory_level(self, inventory_item_id: int, location_id: int, available: int) -> dict:
+    async def set_inventory_level(self, inventory_item_id: int, location_id: int, available: int) -> dict:
         """Set the inventory level for an inventory item at a location."""
         payload = {
             'inventory_item_id': inventory_item_id,
             'location_id': location_id,
             'available': available
         }
-        return self._request('POST', '/inventory_levels/set.json', json=payload)
+        return await self._request('POST', '/inventory_levels/set.json', json=payload)
 
-    def adjust_inventory_level(self, inventory_item_id: int, location_id: int, available_adjustment: int) -> dict:
+    async def adjust_inventory_level(self, inventory_item_id: int, location_id: int, available_adjustment: int) -> dict:
         """Adjust inventory level by a delta (positive or negative)."""
         payload = {
             'inventory_item_id': inventory_item_id,
             'location_id': location_id,
             'available_adjustment': available_adjustment
         }
-        return self._request('POST', '/inventory_levels/adjust.json', json=payload)
+        return await self._request('POST', '/inventory_levels/adjust.json', json=payload)
 
-    def connect_inventory_item(self, inventory_item_id: int, location_id: int, relocate_if_necessary: bool = False) -> dict:
+    async def connect_inventory_item(self, inventory_item_id: int, location_id: int, relocate_if_necessary: bool = False) -> dict:
         """Connect an inventory item to a location."""
         payload = {
             'inventory_item_id': inventory_item_id,
             'location_id': location_id,
             'relocate_if_necessary': relocate_if_necessary
         }
-        return self._request('POST', '/inventory_levels/connect.json', json=payload)
+        return await self._request('POST', '/inventory_levels/connect.json', json=payload)
 
-    def disconnect_inventory_item(self, inventory_item_id: int, location_id: int) -> dict:
+    async def disconnect_inventory_item(self, inventory_item_id: int, location_id: int) -> dict:
         """Disconnect an inventory item from a location."""
         params = {
             'inventory_item_id': inventory_item_id,
             'location_id': location_id
         }
-        return self._request('DELETE', '/inventory_levels.json', params=params)
+        return await self._request('DELETE', '/inventory_levels.json', params=params)
 
     # Inventory Item Methods
-    def get_inventory_item(self, inventory_item_id: int) -> dict:
+    async def get_inventory_item(self, inventory_item_id: int) -> dict:
         """Get a single inventory item by ID."""
-        return self._request('GET', f'/inventory_items/{inventory_item_id}.json')
+        return await self._request('GET', f'/inventory_items/{inventory_item_id}.json')
 
-    def get_inventory_items(self, ids: str) -> dict:
+    async def get_inventory_items(self, ids: str) -> dict:
         """Get multiple inventory items. Pass comma-separated IDs (max 100)."""
         params = {'ids': ids}
-        return self._request('GET', '/inventory_items.json', params=params)
+        return await self._request('GET', '/inventory_items.json', params=params)
 
-    def update_inventory_item(self, inventory_item_id: int, inventory_item_data: dict) -> dict:
+    async def update_inventory_item(self, inventory_item_id: int, inventory_item_data: dict) -> dict:
         """Update an inventory item's details (SKU, cost, tracked status, etc.)."""
-        return self._request('PUT', f'/inventory_items/{inventory_item_id}.json', json={'inventory_item': inventory_item_data})
+        return await self._request('PUT', f'/inventory_items/{inventory_item_id}.json', json={'inventory_item': inventory_item_data})
 
     # Location Methods
-    def get_locations(self) -> dict:
+    async def get_locations(self) -> dict:
         """Get all locations."""
-        return self._request('GET', '/locations.json')
+        return await self._request('GET', '/locations.json')
 
-    def get_location(self, location_id: int) -> dict:
+    async def get_location(self, location_id: int) -> dict:
         """Get a specific location by ID."""
-        return self._request('GET', f'/locations/{location_id}.json')
+        return await self._request('GET', f'/locations/{location_id}.json')
 
-    def get_location_inventory_levels(self, location_id: int) -> dict:
+    async def get_location_inventory_levels(self, location_id: int) -> dict:
         """Get all inventory levels at a specific location."""
-        return self._request('GET', f'/locations/{location_id}/inventory_levels.json')
+        return await self._request('GET', f'/locations/{location_id}/inventory_levels.json')
+
+
+# One client per event loop so the connection pool (and its TLS sessions) stays warm.
+# httpx.AsyncClient connections and the throttling semaphore are bound to the loop that
+# first uses them, so a client must never be shared across loops.
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_shopify_client() -> ShopifyClient:
+    """
+    Get the shared ShopifyClient for the running event loop, creating it on first use.
+
+    Created lazily so each forked worker builds its own pool. Share it within the loop
+    and don't close it with ``async with``; clients of loops that have since been closed
+    are dropped on the next call.
+
+    Raises:
+        RuntimeError: Called outside a running event loop
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        with _clients_lock:
+            for stale in [other for other in _clients if other.is_closed()]:
+                del _clients[stale]
+            client = _clients.get(loop)
+            if client is None:
+                client = _clients[loop] = ShopifyClient()
+    return client
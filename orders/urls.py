@@ -4,10 +4,6 @@ from . import views
 app_name = "orders"
 
 urlpatterns = [
-    path(
-        "webhooks/orders/create/",
-        views.OrderWebhookViewSet.as_view({"post": "create"}),
-        name="order_webhook",
-    ),
+    path("webhooks/orders/create/", views.order_webhook, name="order_webhook"),
 ]
 
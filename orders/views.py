@@ -1,28 +1,62 @@
+import hashlib
 import logging
-from rest_framework import status, viewsets
+import msgspec
+import orjson
+from rest_framework import status
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from django.core.cache import cache
 from django.db import transaction, IntegrityError
 from django.conf import settings
 
-from .models import Order
-from .serializers import OrderWebhookSerializer
-from .publishers import publish_order_created
-from .security import verify_webhook_signature, verify_shopify_webhook
+from .models import Order, OutboxEvent
+from .schemas import decode_order_webhook, schema_errors
+from .serializers import create_order
+from .publishers import build_order_created_event
+from .security import verify_request_signature
 
 logger = logging.getLogger(__name__)
 
+# Placeholder stored while the first request for an order is still being processed
+_CLAIM_PENDING = "__pending__"
 
-class OrderWebhookViewSet(viewsets.ViewSet):
+
+def _delivery_cache_key(request):
+    """
+    Cache key for a webhook delivery: digest of the raw body plus its signature header.
+
+    Including the signature means a hit is only possible for a byte-identical delivery
+    whose signature was already verified, so cached replays can skip verification.
+    """
+    signature = (
+        request.META.get("HTTP_X_SHOPIFY_HMAC_SHA256")
+        or request.META.get("HTTP_X_WEBHOOK_SIGNATURE")
+        or request.META.get("HTTP_X_WEBHOOK_SIGNATURE_BLAKE2")
+        or ""
+    )
+    digest = hashlib.blake2b(request.body, digest_size=16)
+    digest.update(b"\0" + signature.encode("utf-8"))
+    return f"wh:{digest.hexdigest()}"
+
+
+@api_view(["POST"])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def order_webhook(request):
     """
-    ViewSet for handling order webhook events.
+    Handle order webhook events.
 
     Security:
         - Verifies HMAC signature if WEBHOOK_SECRET is configured
         - Supports standard HMAC (X-Webhook-Signature) and Shopify format (X-Shopify-Hmac-SHA256)
+        - Internal senders may use a keyed BLAKE2b MAC instead (X-Webhook-Signature-Blake2),
+          only when INTERNAL_WEBHOOK_SECRET is configured
 
     Expected Headers:
         - X-Webhook-Signature: <hmac_hex_signature>  (standard)
         - X-Shopify-Hmac-SHA256: <base64_signature>  (Shopify)
+        - X-Webhook-Signature-Blake2: <blake2b_256_hex_signature>  (internal senders)
 
     Expected payload:
     {
@@ -39,122 +73,185 @@ class OrderWebhookViewSet(viewsets.ViewSet):
     Idempotency:
         - If idempotency_key is provided and matches existing order, returns 200 (not 201)
         - If idempotency_key is not provided, uses order_id for duplicate detection
+        - Byte-identical redeliveries (same body and signature) of an accepted webhook are
+          answered from the cache for WEBHOOK_DELIVERY_CACHE_TTL seconds, skipping HMAC,
+          parsing and the database
 
     Returns:
         201 Created: {"ok": true, "order_id": "SO-10045", "created": true}
         200 OK: {"ok": true, "order_id": "SO-10045", "created": false}  # Duplicate request
-        400 Bad Request: {"errors": {...}}
+        400 Bad Request: {"errors": {...}}  # e.g. {"items": [{"quantity": ["..."]}]}
         401 Unauthorized: {"error": "Invalid signature"}  # HMAC verification failed
     """
+    # Short-circuit retried deliveries we've already accepted
+    cache_key = _delivery_cache_key(request)
+    order_id = cache.get(cache_key)
+    if order_id is not None:
+        logger.info("Duplicate webhook delivery served from cache for order: %s", order_id)
+        return Response(
+            {
+                "ok": True,
+                "order_id": order_id,
+                "created": False,
+                "message": "Order already exists (idempotent request)",
+            },
+            status=status.HTTP_200_OK,
+        )
 
-    def create(self, request):
-        # HMAC Signature Verification
-        webhook_secret = getattr(settings, "WEBHOOK_SECRET", None)
+    response = _process_webhook(request)
 
-        if webhook_secret:
-            # Get signature from headers (support multiple formats)
-            signature = request.headers.get("X-Webhook-Signature")
-            shopify_signature = request.headers.get("X-Shopify-Hmac-SHA256")
+    if status.is_success(response.status_code):
+        cache.set(
+            cache_key,
+            response.data["order_id"],
+            timeout=getattr(settings, "WEBHOOK_DELIVERY_CACHE_TTL", 3600),
+        )
+    return response
 
-            # Verify signature
-            is_valid = False
 
-            if shopify_signature:
-                # Shopify format (base64)
-                is_valid = verify_shopify_webhook(request.body, shopify_signature)
-            elif signature:
-                # Standard hex format
-                is_valid = verify_webhook_signature(request.body, signature)
-            else:
-                logger.warning("No signature header provided")
+def _process_webhook(request):
+    # HMAC Signature Verification
+    webhook_secret = getattr(settings, "WEBHOOK_SECRET", None)
 
-            if not is_valid:
-                logger.warning(f"Webhook signature verification failed from IP: {request.META.get('REMOTE_ADDR')}")
-                return Response(
-                    {"error": "Invalid signature"}, status=status.HTTP_401_UNAUTHORIZED
-                )
+    if webhook_secret:
+        # Read signature headers straight from META (support multiple formats);
+        # the Shopify base64 header takes precedence over the standard hex one
+        is_valid = verify_request_signature(
+            request.body,
+            shopify_signature=request.META.get("HTTP_X_SHOPIFY_HMAC_SHA256"),
+            hex_signature=request.META.get("HTTP_X_WEBHOOK_SIGNATURE"),
+            blake2_signature=request.META.get("HTTP_X_WEBHOOK_SIGNATURE_BLAKE2"),
+        )
+
+        if not is_valid:
+            logger.warning(
+                "Webhook signature verification failed from IP: %s",
+                request.META.get("REMOTE_ADDR"),
+            )
+            return Response(
+                {"error": "Invalid signature"}, status=status.HTTP_401_UNAUTHORIZED
+            )
 
-            logger.info("Webhook signature verified successfully")
+        logger.info("Webhook signature verified successfully")
 
-        serializer = OrderWebhookSerializer(data=request.data)
+    # Parse and validate the raw body in one pass (bypasses request.data and DRF parsing)
+    try:
+        payload = decode_order_webhook(request.body)
+    except msgspec.ValidationError as e:
+        errors = schema_errors(e)
+        logger.warning("Invalid order webhook payload: %s", errors)
+        return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+    except msgspec.DecodeError as e:
+        # Same body DRF's JSONParser returned for malformed JSON
+        logger.warning("Malformed order webhook body: %s", e)
+        return Response(
+            {"detail": f"JSON parse error - {e}"}, status=status.HTTP_400_BAD_REQUEST
+        )
 
-        if not serializer.is_valid():
-            logger.warning(f"Invalid order webhook payload: {serializer.errors}")
-            return Response({"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    idempotency_key = payload.idempotency_key
+    is_new_order = False
 
-        idempotency_key = request.data.get("idempotency_key")
-        is_new_order = False
+    # Claim the order in the cache before touching Postgres (atomic add == SETNX).
+    # Once processed, the claim holds the order's external_ref, so replays are
+    # answered without any DB query. Keys and order ids get separate namespaces so an
+    # idempotency_key can never collide with another order's external_ref.
+    if idempotency_key:
+        claim_key = f"ord:key:{idempotency_key}"
+    else:
+        claim_key = f"ord:ref:{payload.order_id}"
+    claim_ttl = getattr(settings, "ORDER_CLAIM_CACHE_TTL", 86400)
+    claimed = cache.add(claim_key, _CLAIM_PENDING, timeout=claim_ttl)
+    if not claimed:
+        known_ref = cache.get(claim_key)
+        if known_ref not in (None, _CLAIM_PENDING):
+            logger.info("Duplicate request served from order cache: %s", known_ref)
+            return Response(
+                {
+                    "ok": True,
+                    "order_id": known_ref,
+                    "created": False,
+                    "message": "Order already exists (idempotent request)",
+                },
+                status=status.HTTP_200_OK,
+            )
+        # Still in flight elsewhere: fall through, the unique constraints arbitrate
 
+    try:
+        # Use atomic transaction to ensure order + items are saved together
         try:
-            # Check if this is a duplicate request (idempotency check)
-            if idempotency_key:
-                existing_order = Order.objects.filter(idempotency_key=idempotency_key).first()
-                if existing_order:
-                    logger.info(
-                        f"Duplicate request detected via idempotency_key: {idempotency_key}, "
-                        f"returning existing order: {existing_order.external_ref}"
-                    )
-                    return Response(
-                        {
-                            "ok": True,
-                            "order_id": existing_order.external_ref,
-                            "created": False,
-                            "message": "Order already exists (idempotent request)",
-                        },
-                        status=status.HTTP_200_OK,
+            with transaction.atomic():
+                order, is_new_order = create_order(payload.to_validated_data())
+                if is_new_order:
+                    logger.info("Order created: %s", order.external_ref)
+                    # Record the event in the outbox in the same transaction; drain_outbox
+                    # publishes it, so a rolled-back order never produces an event and
+                    # a Pub/Sub outage never loses one
+                    OutboxEvent.objects.create(
+                        topic=settings.PUBSUB_TOPIC_ORDER_CREATED,
+                        payload_json=orjson.dumps(build_order_created_event(order)).decode(),
                     )
 
-            # Use atomic transaction to ensure order + items are saved together
-            try:
-                with transaction.atomic():
-                    order = serializer.save()
-                    is_new_order = True
-                    logger.info(f"Order created: {order.external_ref}")
-
-            except IntegrityError as e:
-                # Handle duplicate order_id (external_ref) gracefully
-                order_id = request.data.get("order_id")
-                logger.warning(
-                    f"Duplicate order_id detected: {order_id}. Returning existing order."
+            cache.set(claim_key, order.external_ref, timeout=claim_ttl)
+
+            if not is_new_order:
+                # Duplicate request (idempotency check), resolved by the insert itself
+                logger.info(
+                    "Duplicate request detected via idempotency_key: %s, "
+                    "returning existing order: %s",
+                    idempotency_key,
+                    order.external_ref,
+                )
+                return Response(
+                    {
+                        "ok": True,
+                        "order_id": order.external_ref,
+                        "created": False,
+                        "message": "Order already exists (idempotent request)",
+                    },
+                    status=status.HTTP_200_OK,
                 )
 
-                # Try to fetch the existing order
-                existing_order = Order.objects.filter(external_ref=order_id).first()
-
-                if existing_order:
-                    return Response(
-                        {
-                            "ok": True,
-                            "order_id": existing_order.external_ref,
-                            "created": False,
-                            "message": "Order with this order_id already exists",
-                        },
-                        status=status.HTTP_200_OK,
-                    )
-                else:
-                    # Edge case: IntegrityError but can't find order (shouldn't happen)
-                    logger.error(f"IntegrityError but order not found: {order_id}")
-                    return Response(
-                        {"error": "Duplicate order detected", "order_id": order_id},
-                        status=status.HTTP_409_CONFLICT,
-                    )
+        except IntegrityError as e:
+            # Handle duplicate order_id (external_ref) gracefully
+            order_id = payload.order_id
+            logger.warning(
+                "Duplicate order_id detected: %s. Returning existing order.", order_id
+            )
 
-            # Publish event to Pub/Sub only for new orders (outside transaction)
-            if is_new_order:
-                try:
-                    publish_order_created(order)
-                    logger.info(f"Published order.created event for: {order.external_ref}")
-                except Exception as e:
-                    # Log but don't fail the request - order is already saved
-                    logger.error(f"Failed to publish order.created event: {e}", exc_info=True)
+            # Try to fetch the existing order
+            existing_order = Order.objects.filter(external_ref=order_id).first()
 
-            return Response(
-                {"ok": True, "order_id": order.external_ref, "created": is_new_order},
-                status=status.HTTP_201_CREATED if is_new_order else status.HTTP_200_OK,
-            )
+            if existing_order:
+                cache.set(claim_key, existing_order.external_ref, timeout=claim_ttl)
+                return Response(
+                    {
+                        "ok": True,
+                        "order_id": existing_order.external_ref,
+                        "created": False,
+                        "message": "Order with this order_id already exists",
+                    },
+                    status=status.HTTP_200_OK,
+                )
+            else:
+                # Edge case: IntegrityError but can't find order (shouldn't happen)
+                logger.error("IntegrityError but order not found: %s", order_id)
+                if claimed:
+                    cache.delete(claim_key)
+                return Response(
+                    {"error": "Duplicate order detected", "order_id": order_id},
+                    status=status.HTTP_409_CONFLICT,
+                )
 
-        except Exception as e:
-            logger.error(f"Error processing order webhook: {e}", exc_info=True)
-            return Response(
-                {"error": "Internal server error"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        return Response(
+            {"ok": True, "order_id": order.external_ref, "created": is_new_order},
+            status=status.HTTP_201_CREATED if is_new_order else status.HTTP_200_OK,
+        )
+
+    except Exception as e:
+        logger.error("Error processing order webhook: %s", e, exc_info=True)
+        if claimed:
+            # Release the claim so Shopify's retry is processed normally
+            cache.delete(claim_key)
+        return Response(
+            {"error": "Internal server error"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
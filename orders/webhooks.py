@@ -1,14 +1,76 @@
 """
 Egress webhook handler for sending events to external systems.
+
+Egress is already asynchronous with respect to the ingress webhook: the view only
+records an order.created outbox event, and these webhooks are sent by the
+subscribe_order_created worker, whose thread pool absorbs slow receivers.
 """
-import json
+import atexit
 import logging
-from datetime import datetime
+import threading
+import time
+from datetime import UTC, datetime
 import httpx
+import orjson
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+# Per-process pooled client, created on first use so each forked worker owns its own pool
+_client = None
+_client_lock = threading.Lock()
+
+# [epoch seconds, formatted sent_at]; a 1-second resolution is plenty for egress
+_ts_cache = [0.0, ""]
+
+
+def get_http_client():
+    """
+    Get the process-wide keep-alive httpx client for egress webhooks.
+
+    The pool is sized to PUBSUB_WORKERS so every subscriber worker can hold a
+    connection, and the transport retries failed connects.
+
+    Returns:
+        httpx.Client: Shared client (closed automatically at interpreter exit)
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                workers = getattr(settings, "PUBSUB_WORKERS", 16)
+                _client = httpx.Client(
+                    timeout=10.0,
+                    headers={"Content-Type": "application/json"},
+                    # Pool/HTTP2 settings live on the transport when one is supplied
+                    transport=httpx.HTTPTransport(
+                        http2=True,
+                        retries=3,
+                        limits=httpx.Limits(
+                            max_connections=workers, max_keepalive_connections=workers
+                        ),
+                    ),
+                )
+                atexit.register(_client.close)
+    return _client
+
+
+def _sent_at():
+    """
+    Get the current UTC time as an ISO-8601 string, refreshed at most once a second.
+
+    Returns:
+        str: Timestamp such as "2025-01-15T10:30:00Z"
+    """
+    now = time.time()
+    if now - _ts_cache[0] >= 1.0:
+        # Swap both values in one assignment so worker threads never see a torn pair
+        _ts_cache[:] = [
+            now,
+            datetime.fromtimestamp(now, UTC).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        ]
+    return _ts_cache[1]
+
 
 def send_order_created_webhook(event_data):
     """
@@ -28,32 +90,31 @@ def send_order_created_webhook(event_data):
         "order_id": event_data.get("order_id"),
         "customer_name": event_data.get("customer_name"),
         "total": event_data.get("total"),
-        "sent_at": datetime.utcnow().isoformat() + "Z",
+        "sent_at": _sent_at(),
     }
 
     try:
-        logger.info(f"Sending egress webhook to {webhook_url} for order: {payload['order_id']}")
+        logger.info(
+            "Sending egress webhook to %s for order: %s", webhook_url, payload["order_id"]
+        )
 
-        # Send POST request with timeout
-        with httpx.Client(timeout=10.0) as client:
-            response = client.post(
-                webhook_url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-            )
+        # Send POST request over a pooled keep-alive connection
+        response = get_http_client().post(webhook_url, content=orjson.dumps(payload))
 
         response.raise_for_status()
 
         logger.info(
-            f"Egress webhook sent successfully. Status: {response.status_code}, Order: {payload['order_id']}"
+            "Egress webhook sent successfully. Status: %s, Order: %s",
+            response.status_code,
+            payload["order_id"],
         )
 
         return True
 
     except httpx.HTTPError as e:
-        logger.error(f"HTTP error sending egress webhook: {e}")
+        logger.error("HTTP error sending egress webhook: %s", e)
         return False
     except Exception as e:
-        logger.error(f"Unexpected error sending egress webhook: {e}")
+        logger.error("Unexpected error sending egress webhook: %s", e)
         return False
 
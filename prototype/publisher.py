@@ -1,4 +1,6 @@
 """Google Pub/Sub prototype script for learning."""
+import atexit
+import functools
 import json
 import logging
 import os
@@ -8,27 +10,37 @@ from google.cloud import pubsub_v1
 from google.oauth2 import service_account
 from google.api_core.exceptions import AlreadyExists, NotFound, PermissionDenied
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+DEFAULT_PROJECT_ID = "level-calculus-237812"  # ProtoType Project ID
+TOPIC_ID = "prototype-topic"
 
 # Try to load credentials from local JSON file first, then fall back to .env
 script_dir = Path(__file__).resolve().parent
 local_credentials_file = script_dir / "google-service-account-key.json"
 
-credentials = None
 
-if local_credentials_file.exists():
-    # Use the local JSON file directly
-    logging.info(f"Using local credentials file: {local_credentials_file}")
-    credentials = service_account.Credentials.from_service_account_file(
-        str(local_credentials_file)
-    )
-    # Also set environment variable for consistency
-    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(local_credentials_file)
-else:
+def _load_credentials():
+    """
+    Load service account credentials and the project ID.
+
+    Returns:
+        tuple: (credentials or None, project_id)
+    """
+    if local_credentials_file.exists():
+        # Use the local JSON file directly
+        logging.info("Using local credentials file: %s", local_credentials_file)
+        credentials = service_account.Credentials.from_service_account_file(
+            str(local_credentials_file)
+        )
+        # Also set environment variable for consistency
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(local_credentials_file)
+        logging.info("Using service account: %s", credentials.service_account_email)
+        # Get project_id from credentials if available
+        with open(local_credentials_file) as f:
+            creds_data = json.load(f)
+        return credentials, creds_data.get("project_id", DEFAULT_PROJECT_ID)
+
     # Fall back to .env file
     logging.info("Local credentials file not found, checking .env file...")
-    env_path = Path(__file__).resolve().parent.parent / ".env"
     credentials_path = config("GOOGLE_APPLICATION_CREDENTIALS", default=None)
 
     if credentials_path:
@@ -43,79 +55,137 @@ else:
             )
 
         os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(credentials_file.resolve())
-        logging.info(f"Using Google credentials from: {credentials_file.resolve()}")
+        logging.info("Using Google credentials from: %s", credentials_file.resolve())
     else:
         logging.warning(
             "GOOGLE_APPLICATION_CREDENTIALS not set in .env. "
             "Using default credentials if available."
         )
 
-# Initialize publisher client with credentials if we loaded them directly
-if credentials:
-    publisher = pubsub_v1.PublisherClient(credentials=credentials)
-    logging.info(f"Using service account: {credentials.service_account_email}")
-    # Get project_id from credentials if available
-    with open(local_credentials_file) as f:
-        creds_data = json.load(f)
-        project_id = creds_data.get("project_id", "level-calculus-237812")
-else:
-    # It will automatically use GOOGLE_APPLICATION_CREDENTIALS if set
-    publisher = pubsub_v1.PublisherClient()
-    project_id = "level-calculus-237812"  # ProtoType Project ID
-topic_id = "prototype-topic"
-topic_path = publisher.topic_path(project_id, topic_id)
-
-# Ensure topic exists (create if it doesn't)
-# If we don't have permission to create, we'll try to publish anyway
-try:
-    publisher.create_topic(request={"name": topic_path})
-    logging.info(f"Created Pub/Sub topic: {topic_path}")
-except AlreadyExists:
-    logging.info(f"Pub/Sub topic already exists: {topic_path}")
-except PermissionDenied:
-    logging.warning(
-        f"Permission denied to create topic {topic_path}. "
-        f"Attempting to publish anyway (topic may already exist)."
-    )
-except Exception as e:
-    logging.warning(
-        f"Could not create topic {topic_path}: {e}. "
-        f"Attempting to publish anyway (topic may already exist)."
+    # The client will automatically use GOOGLE_APPLICATION_CREDENTIALS if set
+    return None, DEFAULT_PROJECT_ID
+
+
+@functools.lru_cache(maxsize=1)
+def get_publisher():
+    """
+    Create the batching publisher client on first use.
+
+    Returns:
+        tuple: (pubsub_v1.PublisherClient, project_id)
+    """
+    credentials, project_id = _load_credentials()
+
+    # Coalesce bursts of messages into one publish RPC (up to 100 msgs / 1 MB / 50 ms)
+    batch_settings = pubsub_v1.types.BatchSettings(
+        max_messages=100,
+        max_bytes=1024 * 1024,
+        max_latency=0.05,
     )
 
-# Publish a message
-message_data = "Hello, World, Google Pub/Sub!"
-logging.info(f"Publishing message to topic: {topic_id}")
-
-try:
-    future = publisher.publish(topic_path, message_data.encode("utf-8"))
-    message_id = future.result()
-    print(f"✓ Message published successfully! Message ID: {message_id}")
-except NotFound as e:
-    print("\n" + "=" * 60)
-    print("ERROR: Topic not found!")
-    print("=" * 60)
-    print(f"\nThe topic '{topic_id}' does not exist in project '{project_id}'.")
-    print("\nTo fix this, you have two options:")
-    print("\n1. Create the topic manually in Google Cloud Console:")
-    print(f"   - Go to: https://console.cloud.google.com/cloudpubsub/topic/list?project={project_id}")
-    print(f"   - Click 'Create Topic'")
-    print(f"   - Name it: {topic_id}")
-    print("\n2. Grant your service account permission to create topics:")
-    print("   - Go to: IAM & Admin → IAM")
-    print("   - Find your service account and add 'Pub/Sub Admin' role")
-    print("\n" + "=" * 60)
-    raise
-except PermissionDenied as e:
-    print("\n" + "=" * 60)
-    print("ERROR: Permission denied!")
-    print("=" * 60)
-    print(f"\nYour service account doesn't have permission to publish to topic '{topic_id}'.")
-    print("\nTo fix this:")
-    print("   - Go to: IAM & Admin → IAM")
-    print("   - Find your service account and add 'Pub/Sub Publisher' role")
-    print("\n" + "=" * 60)
-    raise
-except Exception as e:
-    print(f"\nERROR: Failed to publish message: {e}")
-    raise
\ No newline at end of file
+    # Initialize publisher client with credentials if we loaded them directly
+    if credentials:
+        publisher = pubsub_v1.PublisherClient(
+            batch_settings=batch_settings, credentials=credentials
+        )
+    else:
+        publisher = pubsub_v1.PublisherClient(batch_settings=batch_settings)
+
+    # Drain in-flight batches before the process exits
+    atexit.register(publisher.stop)
+
+    return publisher, project_id
+
+
+def ensure_topic(publisher, topic_path):
+    """Ensure the topic exists; if we can't create it, try to publish anyway."""
+    try:
+        publisher.create_topic(request={"name": topic_path})
+        logging.info("Created Pub/Sub topic: %s", topic_path)
+    except AlreadyExists:
+        logging.info("Pub/Sub topic already exists: %s", topic_path)
+    except PermissionDenied:
+        logging.warning(
+            "Permission denied to create topic %s. "
+            "Attempting to publish anyway (topic may already exist).",
+            topic_path,
+        )
+    except Exception as e:
+        logging.warning(
+            "Could not create topic %s: %s. "
+            "Attempting to publish anyway (topic may already exist).",
+            topic_path,
+            e,
+        )
+
+
+def _log_publish_result(future):
+    """Log the outcome of a batched publish without blocking the caller."""
+    exc = future.exception()
+    if exc is not None:
+        logging.error("Publish failed: %s", exc)
+    else:
+        logging.info("Publish confirmed. Message ID: %s", future.result())
+
+
+def publish(message: bytes, topic_id: str = TOPIC_ID):
+    """
+    Queue a message on the batching publisher.
+
+    Returns:
+        Future: Resolves to the message ID once Pub/Sub acknowledges the batch
+    """
+    publisher, project_id = get_publisher()
+    topic_path = publisher.topic_path(project_id, topic_id)
+    logging.info("Publishing message to topic: %s", topic_id)
+    future = publisher.publish(topic_path, message)
+    future.add_done_callback(_log_publish_result)
+    return future
+
+
+def main():
+    # Configure logging
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+    publisher, project_id = get_publisher()
+    ensure_topic(publisher, publisher.topic_path(project_id, TOPIC_ID))
+
+    # Publish a message
+    try:
+        future = publish(b"Hello, World, Google Pub/Sub!")
+        # This one-shot demo reports the outcome (and the fix-it hints below) before exiting,
+        # so it waits here; a long-running publisher would rely on the callback instead
+        message_id = future.result()
+        print(f"✓ Message published successfully! Message ID: {message_id}")
+    except NotFound as e:
+        print("\n" + "=" * 60)
+        print("ERROR: Topic not found!")
+        print("=" * 60)
+        print(f"\nThe topic '{TOPIC_ID}' does not exist in project '{project_id}'.")
+        print("\nTo fix this, you have two options:")
+        print("\n1. Create the topic manually in Google Cloud Console:")
+        print(f"   - Go to: https://console.cloud.google.com/cloudpubsub/topic/list?project={project_id}")
+        print(f"   - Click 'Create Topic'")
+        print(f"   - Name it: {TOPIC_ID}")
+        print("\n2. Grant your service account permission to create topics:")
+        print("   - Go to: IAM & Admin → IAM")
+        print("   - Find your service account and add 'Pub/Sub Admin' role")
+        print("\n" + "=" * 60)
+        raise
+    except PermissionDenied as e:
+        print("\n" + "=" * 60)
+        print("ERROR: Permission denied!")
+        print("=" * 60)
+        print(f"\nYour service account doesn't have permission to publish to topic '{TOPIC_ID}'.")
+        print("\nTo fix this:")
+        print("   - Go to: IAM & Admin → IAM")
+        print("   - Find your service account and add 'Pub/Sub Publisher' role")
+        print("\n" + "=" * 60)
+        raise
+    except Exception as e:
+        print(f"\nERROR: Failed to publish message: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
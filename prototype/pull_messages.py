@@ -19,7 +19,7 @@ credentials = None
 
 if local_credentials_file.exists():
     # Use the local JSON file directly
-    logging.info(f"Using local credentials file: {local_credentials_file}")
+    logging.info("Using local credentials file: %s", local_credentials_file)
     credentials = service_account.Credentials.from_service_account_file(
         str(local_credentials_file)
     )
@@ -43,7 +43,7 @@ else:
             )
 
         os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(credentials_file.resolve())
-        logging.info(f"Using Google credentials from: {credentials_file.resolve()}")
+        logging.info("Using Google credentials from: %s", credentials_file.resolve())
     else:
         logging.warning(
             "GOOGLE_APPLICATION_CREDENTIALS not set in .env. "
@@ -53,7 +53,7 @@ else:
 # Initialize subscriber client with credentials if we loaded them directly
 if credentials:
     subscriber = pubsub_v1.SubscriberClient(credentials=credentials)
-    logging.info(f"Using service account: {credentials.service_account_email}")
+    logging.info("Using service account: %s", credentials.service_account_email)
     # Get project_id from credentials if available
     with open(local_credentials_file) as f:
         creds_data = json.load(f)
@@ -73,13 +73,14 @@ try:
     subscriber.create_subscription(
         request={"name": subscription_path, "topic": topic_path}
     )
-    logging.info(f"Created Pub/Sub subscription: {subscription_path}")
+    logging.info("Created Pub/Sub subscription: %s", subscription_path)
 except AlreadyExists:
-    logging.info(f"Pub/Sub subscription already exists: {subscription_path}")
+    logging.info("Pub/Sub subscription already exists: %s", subscription_path)
 except PermissionDenied:
     logging.warning(
-        f"Permission denied to create subscription {subscription_path}. "
-        f"Attempting to pull messages anyway (subscription may already exist)."
+        "Permission denied to create subscription %s. "
+        "Attempting to pull messages anyway (subscription may already exist).",
+        subscription_path,
     )
 except NotFound:
     print("\n" + "=" * 60)
@@ -91,8 +92,10 @@ except NotFound:
     exit(1)
 except Exception as e:
     logging.warning(
-        f"Could not create subscription {subscription_path}: {e}. "
-        f"Attempting to pull messages anyway (subscription may already exist)."
+        "Could not create subscription %s: %s. "
+        "Attempting to pull messages anyway (subscription may already exist).",
+        subscription_path,
+        e,
     )
 
 # Pull messages (non-streaming)
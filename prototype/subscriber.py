@@ -3,33 +3,51 @@ import json
 import logging
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+import orjson
 from pathlib import Path
 from decouple import config
 from google.cloud import pubsub_v1
 from google.oauth2 import service_account
 from google.api_core.exceptions import AlreadyExists, NotFound, PermissionDenied
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+DEFAULT_PROJECT_ID = "level-calculus-237812"  # ProtoType Project ID
+TOPIC_ID = "prototype-topic"
+SUBSCRIPTION_ID = "prototype-subscription"
+
+# Many in-flight messages spread over a wide callback pool; the default single-threaded
+# executor serialises the callback and caps pull throughput
+FLOW_CONTROL = pubsub_v1.types.FlowControl(max_messages=1000, max_bytes=100 * 1024 * 1024)
+CALLBACK_WORKERS = 32
+
+# Set SUB_VERBOSE=1 to also pretty-print JSON message bodies
+VERBOSE = bool(os.environ.get("SUB_VERBOSE"))
 
 # Try to load credentials from local JSON file first, then fall back to .env
 script_dir = Path(__file__).resolve().parent
 local_credentials_file = script_dir / "google-service-account-key.json"
 
-credentials = None
 
-if local_credentials_file.exists():
-    # Use the local JSON file directly
-    logging.info(f"Using local credentials file: {local_credentials_file}")
-    credentials = service_account.Credentials.from_service_account_file(
-        str(local_credentials_file)
-    )
-    # Also set environment variable for consistency
-    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(local_credentials_file)
-else:
+def _load_credentials():
+    """
+    Load service account credentials and the project ID.
+
+    Returns:
+        tuple: (credentials or None, project_id)
+    """
+    if local_credentials_file.exists():
+        # Use the local JSON file directly; read and parse it once for both the
+        # credentials and the project_id
+        logging.info("Using local credentials file: %s", local_credentials_file)
+        creds_data = json.loads(local_credentials_file.read_bytes())
+        credentials = service_account.Credentials.from_service_account_info(creds_data)
+        # Also set environment variable for consistency
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(local_credentials_file)
+        logging.info("Using service account: %s", credentials.service_account_email)
+        return credentials, creds_data.get("project_id", DEFAULT_PROJECT_ID)
+
     # Fall back to .env file
     logging.info("Local credentials file not found, checking .env file...")
-    env_path = Path(__file__).resolve().parent.parent / ".env"
     credentials_path = config("GOOGLE_APPLICATION_CREDENTIALS", default=None)
 
     if credentials_path:
@@ -44,119 +62,158 @@ else:
             )
 
         os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(credentials_file.resolve())
-        logging.info(f"Using Google credentials from: {credentials_file.resolve()}")
+        logging.info("Using Google credentials from: %s", credentials_file.resolve())
     else:
         logging.warning(
             "GOOGLE_APPLICATION_CREDENTIALS not set in .env. "
             "Using default credentials if available."
         )
 
-# Initialize subscriber client with credentials if we loaded them directly
-if credentials:
-    subscriber = pubsub_v1.SubscriberClient(credentials=credentials)
-    logging.info(f"Using service account: {credentials.service_account_email}")
-    # Get project_id from credentials if available
-    with open(local_credentials_file) as f:
-        creds_data = json.load(f)
-        project_id = creds_data.get("project_id", "level-calculus-237812")
-else:
-    # It will automatically use GOOGLE_APPLICATION_CREDENTIALS if set
-    subscriber = pubsub_v1.SubscriberClient()
-    project_id = "level-calculus-237812"  # ProtoType Project ID
-
-topic_id = "prototype-topic"
-subscription_id = "prototype-subscription"
-topic_path = subscriber.topic_path(project_id, topic_id)
-subscription_path = subscriber.subscription_path(project_id, subscription_id)
-
-# Ensure subscription exists (create if it doesn't)
-try:
-    subscriber.create_subscription(
-        request={"name": subscription_path, "topic": topic_path}
-    )
-    logging.info(f"Created Pub/Sub subscription: {subscription_path}")
-except AlreadyExists:
-    logging.info(f"Pub/Sub subscription already exists: {subscription_path}")
-except PermissionDenied:
-    logging.warning(
-        f"Permission denied to create subscription {subscription_path}. "
-        f"Attempting to pull messages anyway (subscription may already exist)."
-    )
-except NotFound:
-    print("\n" + "=" * 60)
-    print("ERROR: Topic not found!")
-    print("=" * 60)
-    print(f"\nThe topic '{topic_id}' does not exist in project '{project_id}'.")
-    print("\nPlease create the topic first using publisher.py or in the Google Cloud Console.")
-    print("\n" + "=" * 60)
-    sys.exit(1)
-except Exception as e:
-    logging.warning(
-        f"Could not create subscription {subscription_path}: {e}. "
-        f"Attempting to pull messages anyway (subscription may already exist)."
-    )
+    # The client will automatically use GOOGLE_APPLICATION_CREDENTIALS if set
+    return None, DEFAULT_PROJECT_ID
+
+
+def ensure_subscription(subscriber, topic_path, subscription_path, project_id):
+    """Create the subscription only if a GET says it's missing (one RPC when it exists)."""
+    try:
+        subscriber.get_subscription(request={"subscription": subscription_path})
+        logging.info("Pub/Sub subscription already exists: %s", subscription_path)
+        return
+    except NotFound:
+        pass
+
+    try:
+        subscriber.create_subscription(request={"name": subscription_path, "topic": topic_path})
+        logging.info("Created Pub/Sub subscription: %s", subscription_path)
+    except AlreadyExists:
+        # Created by someone else between our GET and CREATE
+        logging.info("Pub/Sub subscription already exists: %s", subscription_path)
+    except NotFound:
+        print("\n" + "=" * 60)
+        print("ERROR: Topic not found!")
+        print("=" * 60)
+        print(f"\nThe topic '{TOPIC_ID}' does not exist in project '{project_id}'.")
+        print("\nPlease create the topic first using publisher.py or in the Google Cloud Console.")
+        print("\n" + "=" * 60)
+        sys.exit(1)
 
 
 def callback(message: pubsub_v1.subscriber.message.Message) -> None:
     """Callback function to handle received messages."""
-    print("\n" + "=" * 60)
-    print("📨 Message Received!")
-    print("=" * 60)
-    print(f"Message ID: {message.message_id}")
-    print(f"Publish Time: {message.publish_time}")
+    # Build the whole report and write it once: one stdout lock per message keeps the
+    # worker threads from serialising on (and interleaving) many small print() calls
+    lines = [
+        "",
+        "=" * 60,
+        "📨 Message Received!",
+        "=" * 60,
+        f"Message ID: {message.message_id}",
+        f"Publish Time: {message.publish_time}",
+    ]
 
     # Try to decode as UTF-8 text
     try:
         message_data = message.data.decode("utf-8")
-        print(f"\nMessage Data:")
-        print(f"  {message_data}")
-
-        # Try to parse as JSON if possible
-        try:
-            json_data = json.loads(message_data)
-            print(f"\nMessage Data (JSON):")
-            print(json.dumps(json_data, indent=2))
-        except json.JSONDecodeError:
-            pass  # Not JSON, that's fine
-    except Exception as e:
-        print(f"\nMessage Data (raw bytes, couldn't decode):")
-        print(f"  {message.data}")
+    except UnicodeDecodeError:
+        lines += ["", "Message Data (raw bytes, couldn't decode):", f"  {message.data}"]
+    else:
+        lines += ["", "Message Data:", f"  {message_data}"]
+
+        # Pretty-printing JSON is comparatively expensive, so only do it when asked to.
+        # Sniff the first byte so plain-text messages skip the parse (and its exception)
+        if VERBOSE and message.data.lstrip()[:1] in (b"{", b"["):
+            try:
+                # orjson parses the raw bytes directly, without a second pass over a str
+                json_data = orjson.loads(message.data)
+            except orjson.JSONDecodeError:
+                pass  # Looked like JSON but wasn't, that's fine
+            else:
+                lines += [
+                    "",
+                    "Message Data (JSON):",
+                    orjson.dumps(json_data, option=orjson.OPT_INDENT_2).decode(),
+                ]
 
     # Print attributes if any
     if message.attributes:
-        print(f"\nAttributes:")
-        for key, value in message.attributes.items():
-            print(f"  {key}: {value}")
+        lines += ["", "Attributes:"]
+        lines += [f"  {key}: {value}" for key, value in message.attributes.items()]
 
-    print("=" * 60)
+    lines.append("=" * 60)
 
     # Acknowledge the message so it's not redelivered
     message.ack()
-    print("✓ Message acknowledged\n")
-
-
-# Pull messages
-print("\n" + "=" * 60)
-print("🔔 Listening for messages...")
-print("=" * 60)
-print(f"Topic: {topic_id}")
-print(f"Subscription: {subscription_id}")
-print(f"Project: {project_id}")
-print("\nPress Ctrl+C to stop\n")
-
-try:
-    # Pull messages synchronously (one at a time)
-    # This will block and wait for messages
-    streaming_pull_future = subscriber.subscribe(subscription_path, callback=callback)
-
-    # Keep the main thread alive
-    streaming_pull_future.result()
-except KeyboardInterrupt:
-    print("\n\nStopping subscriber...")
-    streaming_pull_future.cancel()
-    print("✓ Subscriber stopped")
-except Exception as e:
-    print(f"\nERROR: Failed to subscribe: {e}")
-    sys.exit(1)
+    lines += ["✓ Message acknowledged", "", ""]
+
+    sys.stdout.write("\n".join(lines))
+
+
+def main():
+    # Configure logging
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+    # Initialize subscriber client with credentials if we loaded them directly
+    credentials, project_id = _load_credentials()
+    if credentials:
+        subscriber = pubsub_v1.SubscriberClient(credentials=credentials)
+    else:
+        subscriber = pubsub_v1.SubscriberClient()
+
+    topic_path = subscriber.topic_path(project_id, TOPIC_ID)
+    subscription_path = subscriber.subscription_path(project_id, SUBSCRIPTION_ID)
+
+    # Ensure subscription exists (create if it doesn't)
+    try:
+        ensure_subscription(subscriber, topic_path, subscription_path, project_id)
+    except PermissionDenied:
+        logging.warning(
+            "Permission denied to check or create subscription %s. "
+            "Attempting to pull messages anyway (subscription may already exist).",
+            subscription_path,
+        )
+    except Exception as e:
+        logging.warning(
+            "Could not create subscription %s: %s. "
+            "Attempting to pull messages anyway (subscription may already exist).",
+            subscription_path,
+            e,
+        )
+
+    # Pull messages
+    print("\n" + "=" * 60)
+    print("🔔 Listening for messages...")
+    print("=" * 60)
+    print(f"Topic: {TOPIC_ID}")
+    print(f"Subscription: {SUBSCRIPTION_ID}")
+    print(f"Project: {project_id}")
+    print("\nPress Ctrl+C to stop\n")
+
+    # Streaming pull; callbacks run concurrently on the scheduler's thread pool
+    scheduler = pubsub_v1.subscriber.scheduler.ThreadScheduler(
+        executor=ThreadPoolExecutor(max_workers=CALLBACK_WORKERS)
+    )
+    try:
+        streaming_pull_future = subscriber.subscribe(
+            subscription_path,
+            callback=callback,
+            flow_control=FLOW_CONTROL,
+            scheduler=scheduler,
+        )
+    except Exception as e:
+        print(f"\nERROR: Failed to subscribe: {e}")
+        sys.exit(1)
+
+    try:
+        # Keep the main thread alive
+        streaming_pull_future.result()
+    except KeyboardInterrupt:
+        print("\n\nStopping subscriber...")
+        streaming_pull_future.cancel()
+        print("✓ Subscriber stopped")
+    except Exception as e:
+        print(f"\nERROR: Failed to subscribe: {e}")
+        sys.exit(1)
 
 
+if __name__ == "__main__":
+    main()
@@ -3,160 +3,213 @@
 Test script for webhook HMAC signature verification.
 Demonstrates how to send properly signed webhooks.
 """
-import json
 import hmac
 import hashlib
-import base64
+import binascii
+import orjson
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 # Configuration
 WEBHOOK_URL = "http://localhost:8000/webhooks/orders/create/"
 WEBHOOK_SECRET = "your-secret-key-here"  # Match your .env WEBHOOK_SECRET
+INTERNAL_WEBHOOK_SECRET = "your-internal-secret-here"  # Match your .env INTERNAL_WEBHOOK_SECRET
 
+# One keep-alive session for every test; per-call headers only carry the signature
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=64, max_retries=0))
+SESSION.headers.update({"Content-Type": "application/json"})
 
-def generate_hmac_signature(payload_str, secret):
-    """Generate HMAC-SHA256 signature (hex format)."""
-    return hmac.new(
-        secret.encode("utf-8"), payload_str.encode("utf-8"), hashlib.sha256
-    ).hexdigest()
+# Pre-keyed HMAC for the configured secret; .copy() reuses its key schedule per signature
+_HMAC_TEMPLATE = hmac.new(WEBHOOK_SECRET.encode("utf-8"), None, "sha256")
+_INTERNAL_SECRET = INTERNAL_WEBHOOK_SECRET.encode("utf-8")
 
 
-def generate_shopify_signature(payload_str, secret):
-    """Generate Shopify-style HMAC-SHA256 signature (base64 format)."""
-    return base64.b64encode(
-        hmac.new(secret.encode("utf-8"), payload_str.encode("utf-8"), hashlib.sha256).digest()
-    ).decode()
+# Shared order body; each test only swaps in its own identifying fields
+_BASE_PAYLOAD = {
+    "order_id": "SO-00000",
+    "idempotency_key": "hmac-test-000",
+    "customer": {"name": "HMAC Test User", "email": "hmac@example.com"},
+    "items": [{"sku": "SECURE-001", "name": "Secure Product", "quantity": 1, "unit_price": 999.99}],
+    "shipping_address": "999 Secure St, Auth City, CA 90210",
+    "total": 999.99,
+}
+
+
+def sign_bytes(body, secret=None):
+    """
+    Raw HMAC-SHA256 digest of body (bytes), keyed with secret (defaults to WEBHOOK_SECRET).
+
+    Kept as bytes so local round-trip checks can hmac.compare_digest() without
+    going through a hex str first.
+    """
+    if secret is not None:
+        # One-shot hmac.digest with a digest name takes OpenSSL's fast path
+        return hmac.digest(secret.encode("utf-8"), body, "sha256")
+    mac = _HMAC_TEMPLATE.copy()
+    mac.update(body)
+    return mac.digest()
+
+
+def generate_hmac_signature(body, secret=None):
+    """Generate HMAC-SHA256 signature (hex format) over the exact request body bytes."""
+    return binascii.hexlify(sign_bytes(body, secret)).decode("ascii")
+
+
+def generate_shopify_signature(body, secret=None):
+    """Generate Shopify-style HMAC-SHA256 signature (base64 format) over the body bytes."""
+    # b2a_base64 is the C call that base64.b64encode wraps, minus the Python-level hop
+    return binascii.b2a_base64(sign_bytes(body, secret), newline=False).decode("ascii")
+
+
+def sign_blake2(body):
+    """Generate keyed BLAKE2b-256 signature (hex format) for X-Webhook-Signature-Blake2."""
+    return hashlib.blake2b(body, key=_INTERNAL_SECRET, digest_size=32).hexdigest()
+
+
+def encode_payload(payload):
+    """Serialize payload once; the same bytes are signed and sent as the request body."""
+    # orjson emits compact UTF-8 bytes directly, ready for hmac and the request body
+    return orjson.dumps(payload)
 
 
 def test_webhook_with_signature():
     """Test webhook with valid HMAC signature."""
-    payload = {
-        "order_id": "SO-99999",
-        "idempotency_key": "hmac-test-001",
-        "customer": {"name": "HMAC Test User", "email": "hmac@example.com"},
-        "items": [{"sku": "SECURE-001", "name": "Secure Product", "quantity": 1, "unit_price": 999.99}],
-        "shipping_address": "999 Secure St, Auth City, CA 90210",
-        "total": 999.99,
-    }
+    report = []
+    payload = {**_BASE_PAYLOAD, "order_id": "SO-99999", "idempotency_key": "hmac-test-001"}
 
-    # Convert to JSON string
-    payload_str = json.dumps(payload)
+    # Serialize once: these exact bytes are signed and sent
+    body = encode_payload(payload)
 
     # Generate signature
-    signature = generate_hmac_signature(payload_str, WEBHOOK_SECRET)
+    signature = generate_hmac_signature(body)
 
     # Send request with signature header
     headers = {
-        "Content-Type": "application/json",
         "X-Webhook-Signature": signature,
     }
 
-    print("=" * 60)
-    print("TEST 1: Valid HMAC Signature")
-    print("=" * 60)
-    print(f"Payload: {payload_str}")
-    print(f"Signature: {signature}")
-    print(f"Headers: {headers}")
+    report.append("=" * 60)
+    report.append("TEST 1: Valid HMAC Signature")
+    report.append("=" * 60)
+    report.append(f"Payload: {body.decode()}")
+    report.append(f"Signature: {signature}")
+    report.append(f"Headers: {headers}")
 
-    response = requests.post(WEBHOOK_URL, json=payload, headers=headers)
+    response = SESSION.post(WEBHOOK_URL, data=body, headers=headers)
 
-    print(f"\nResponse Status: {response.status_code}")
-    print(f"Response Body: {response.json()}")
-    print("\n✅ Expected: 201 Created\n")
+    report.append(f"\nResponse Status: {response.status_code}")
+    report.append(f"Response Body: {response.json()}")
+    report.append("\n✅ Expected: 201 Created\n")
+    return "\n".join(report)
 
 
 def test_webhook_invalid_signature():
     """Test webhook with invalid HMAC signature."""
-    payload = {
-        "order_id": "SO-99998",
-        "idempotency_key": "hmac-test-002",
-        "customer": {"name": "Invalid Signature Test", "email": "invalid@example.com"},
-        "items": [{"sku": "INSECURE-001", "name": "Hacker Product", "quantity": 1, "unit_price": 1.00}],
-        "shipping_address": "123 Hacker Lane",
-        "total": 1.00,
-    }
+    report = []
+    payload = {**_BASE_PAYLOAD, "order_id": "SO-99998", "idempotency_key": "hmac-test-002"}
+
+    body = encode_payload(payload)
 
     # Send request with WRONG signature
     headers = {
-        "Content-Type": "application/json",
         "X-Webhook-Signature": "wrong_signature_12345",
     }
 
-    print("=" * 60)
-    print("TEST 2: Invalid HMAC Signature (Should Fail)")
-    print("=" * 60)
-    print(f"Payload: {json.dumps(payload)}")
-    print(f"Headers: {headers}")
+    report.append("=" * 60)
+    report.append("TEST 2: Invalid HMAC Signature (Should Fail)")
+    report.append("=" * 60)
+    report.append(f"Payload: {body.decode()}")
+    report.append(f"Headers: {headers}")
 
-    response = requests.post(WEBHOOK_URL, json=payload, headers=headers)
+    response = SESSION.post(WEBHOOK_URL, data=body, headers=headers)
 
-    print(f"\nResponse Status: {response.status_code}")
-    print(f"Response Body: {response.json()}")
-    print("\n❌ Expected: 401 Unauthorized\n")
+    report.append(f"\nResponse Status: {response.status_code}")
+    report.append(f"Response Body: {response.json()}")
+    report.append("\n❌ Expected: 401 Unauthorized\n")
+    return "\n".join(report)
 
 
 def test_webhook_no_signature():
     """Test webhook without signature header (should fail if WEBHOOK_SECRET is set)."""
-    payload = {
-        "order_id": "SO-99997",
-        "idempotency_key": "hmac-test-003",
-        "customer": {"name": "No Signature Test", "email": "nosig@example.com"},
-        "items": [{"sku": "NOSIG-001", "name": "No Sig Product", "quantity": 1, "unit_price": 1.00}],
-        "shipping_address": "456 No Auth St",
-        "total": 1.00,
-    }
+    report = []
+    payload = {**_BASE_PAYLOAD, "order_id": "SO-99997", "idempotency_key": "hmac-test-003"}
 
-    headers = {
-        "Content-Type": "application/json",
-        # No signature header
-    }
+    body = encode_payload(payload)
 
-    print("=" * 60)
-    print("TEST 3: No Signature Header (Should Fail)")
-    print("=" * 60)
-    print(f"Payload: {json.dumps(payload)}")
-    print(f"Headers: {headers}")
+    headers = {}  # No signature header
 
-    response = requests.post(WEBHOOK_URL, json=payload, headers=headers)
+    report.append("=" * 60)
+    report.append("TEST 3: No Signature Header (Should Fail)")
+    report.append("=" * 60)
+    report.append(f"Payload: {body.decode()}")
+    report.append(f"Headers: {headers}")
 
-    print(f"\nResponse Status: {response.status_code}")
-    print(f"Response Body: {response.json()}")
-    print("\n❌ Expected: 401 Unauthorized\n")
+    response = SESSION.post(WEBHOOK_URL, data=body, headers=headers)
+
+    report.append(f"\nResponse Status: {response.status_code}")
+    report.append(f"Response Body: {response.json()}")
+    report.append("\n❌ Expected: 401 Unauthorized\n")
+    return "\n".join(report)
 
 
 def test_shopify_webhook():
     """Test Shopify-style webhook with base64 signature."""
-    payload = {
-        "order_id": "SO-99996",
-        "idempotency_key": "shopify-test-001",
-        "customer": {"name": "Shopify Test", "email": "shopify@example.com"},
-        "items": [{"sku": "SHOP-001", "name": "Shopify Product", "quantity": 2, "unit_price": 49.99}],
-        "shipping_address": "789 Shopify Ave, E-commerce City",
-        "total": 99.98,
-    }
+    report = []
+    payload = {**_BASE_PAYLOAD, "order_id": "SO-99996", "idempotency_key": "shopify-test-001"}
 
-    payload_str = json.dumps(payload)
+    body = encode_payload(payload)
 
     # Generate Shopify-style signature (base64)
-    signature = generate_shopify_signature(payload_str, WEBHOOK_SECRET)
+    signature = generate_shopify_signature(body)
 
     headers = {
-        "Content-Type": "application/json",
         "X-Shopify-Hmac-SHA256": signature,
     }
 
-    print("=" * 60)
-    print("TEST 4: Shopify-Style HMAC Signature (Base64)")
-    print("=" * 60)
-    print(f"Payload: {payload_str}")
-    print(f"Shopify Signature: {signature}")
-    print(f"Headers: {headers}")
+    report.append("=" * 60)
+    report.append("TEST 4: Shopify-Style HMAC Signature (Base64)")
+    report.append("=" * 60)
+    report.append(f"Payload: {body.decode()}")
+    report.append(f"Shopify Signature: {signature}")
+    report.append(f"Headers: {headers}")
+
+    response = SESSION.post(WEBHOOK_URL, data=body, headers=headers)
+
+    report.append(f"\nResponse Status: {response.status_code}")
+    report.append(f"Response Body: {response.json()}")
+    report.append("\n✅ Expected: 201 Created\n")
+    return "\n".join(report)
+
+
+def test_webhook_blake2():
+    """Test webhook with keyed BLAKE2b signature (internal senders, not Shopify)."""
+    report = []
+    payload = {**_BASE_PAYLOAD, "order_id": "SO-99995", "idempotency_key": "blake2-test-001"}
+
+    body = encode_payload(payload)
+
+    # Generate keyed BLAKE2b signature (hex)
+    signature = sign_blake2(body)
+
+    headers = {
+        "X-Webhook-Signature-Blake2": signature,
+    }
+
+    report.append("=" * 60)
+    report.append("TEST 5: Keyed BLAKE2b Signature")
+    report.append("=" * 60)
+    report.append(f"Payload: {body.decode()}")
+    report.append(f"BLAKE2b Signature: {signature}")
+    report.append(f"Headers: {headers}")
 
-    response = requests.post(WEBHOOK_URL, json=payload, headers=headers)
+    response = SESSION.post(WEBHOOK_URL, data=body, headers=headers)
 
-    print(f"\nResponse Status: {response.status_code}")
-    print(f"Response Body: {response.json()}")
-    print("\n✅ Expected: 201 Created\n")
+    report.append(f"\nResponse Status: {response.status_code}")
+    report.append(f"Response Body: {response.json()}")
+    report.append("\n✅ Expected: 201 Created (401 if INTERNAL_WEBHOOK_SECRET is not configured)\n")
+    return "\n".join(report)
 
 
 if __name__ == "__main__":
@@ -164,18 +217,20 @@ if __name__ == "__main__":
     print(f"Testing against: {WEBHOOK_URL}")
     print(f"Using secret: {WEBHOOK_SECRET[:10]}...\n")
 
-    try:
-        # Test with valid signature
-        test_webhook_with_signature()
-
-        # Test with invalid signature
-        test_webhook_invalid_signature()
+    tests = [
+        test_webhook_with_signature,  # Valid signature
+        test_webhook_invalid_signature,  # Invalid signature
+        test_webhook_no_signature,  # No signature
+        test_shopify_webhook,  # Shopify format
+        test_webhook_blake2,  # Keyed BLAKE2b format
+    ]
 
-        # Test without signature
-        test_webhook_no_signature()
-
-        # Test Shopify format
-        test_shopify_webhook()
+    try:
+        # The tests are independent and I/O-bound, so run them concurrently over the
+        # shared session; each returns its report, printed here in test order
+        with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+            for report in executor.map(lambda test: test(), tests):
+                print(report)
 
         print("=" * 60)
         print("✅ All tests complete!")
@@ -0,0 +1,89 @@
+"""
+Tests for the drain_outbox management command.
+"""
+from concurrent.futures import Future
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from orders.models import OutboxEvent
+from orders.publishers import PUBLISH_FAILURES
+
+COMMAND = "orders.management.commands.drain_outbox"
+
+
+def _future(exc=None):
+    future = Future()
+    if exc is None:
+        future.set_result("message-id")
+    else:
+        future.set_exception(exc)
+    return future
+
+
+class DrainOutboxTests(TestCase):
+    def setUp(self):
+        self.publisher = mock.Mock()
+        self.ensure_topic = mock.Mock(side_effect=lambda topic: f"projects/p/topics/{topic}")
+        self.sleep = mock.Mock()
+        for target, new in [
+            ("get_publisher", mock.Mock(return_value=self.publisher)),
+            ("ensure_topic_exists", self.ensure_topic),
+            ("time.sleep", self.sleep),
+        ]:
+            patcher = mock.patch(f"{COMMAND}.{target}", new)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def drain(self):
+        call_command("drain_outbox", once=True, interval=0, stdout=StringIO())
+
+    def test_publishes_and_marks_delivered(self):
+        OutboxEvent.objects.create(topic="orders", payload_json='{"n":1}')
+        OutboxEvent.objects.create(topic="orders", payload_json='{"n":2}')
+        self.publisher.publish.side_effect = lambda topic, data: _future()
+
+        self.drain()
+
+        self.assertFalse(OutboxEvent.objects.filter(delivered_at__isnull=True).exists())
+        self.assertEqual(
+            [c.args for c in self.publisher.publish.call_args_list],
+            [("projects/p/topics/orders", b'{"n":1}'), ("projects/p/topics/orders", b'{"n":2}')],
+        )
+        # Resolved once for the batch, not once per event
+        self.ensure_topic.assert_called_once_with("orders")
+
+    def test_failed_event_stays_pending_and_is_retried(self):
+        ok = OutboxEvent.objects.create(topic="orders", payload_json='{"n":1}')
+        flaky = OutboxEvent.objects.create(topic="orders", payload_json='{"n":2}')
+        self.publisher.publish.side_effect = [
+            _future(),
+            _future(RuntimeError("deadline exceeded")),
+            _future(),
+        ]
+        failures = PUBLISH_FAILURES.labels(topic="orders")
+        before = failures._value.get()
+
+        self.drain()
+
+        self.assertEqual(self.publisher.publish.call_count, 3)
+        self.assertEqual(self.publisher.publish.call_args_list[2].args[1], b'{"n":2}')
+        self.assertEqual(failures._value.get(), before + 1)
+        ok.refresh_from_db()
+        flaky.refresh_from_db()
+        self.assertIsNotNone(ok.delivered_at)
+        self.assertIsNotNone(flaky.delivered_at)
+
+    def test_admin_api_failure_does_not_stop_the_drainer(self):
+        event = OutboxEvent.objects.create(topic="orders", payload_json='{"n":1}')
+        self.ensure_topic.side_effect = [ConnectionError("pubsub down"), "projects/p/topics/orders"]
+        self.publisher.publish.side_effect = lambda topic, data: _future()
+
+        with self.assertLogs(COMMAND, level="ERROR"):
+            self.drain()
+
+        self.sleep.assert_called_once_with(0)
+        event.refresh_from_db()
+        self.assertIsNotNone(event.delivered_at)
@@ -0,0 +1,76 @@
+"""
+Tests for the order webhook's cache-based idempotency claims.
+"""
+import orjson
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from orders.models import Order
+from orders.views import _CLAIM_PENDING
+
+
+def _order_payload(order_id, idempotency_key=None):
+    payload = {
+        "order_id": order_id,
+        "customer": {"name": "Jane Doe", "email": "jane@example.com"},
+        "items": [{"sku": "ABC123", "name": "Solar Panel", "quantity": 2, "unit_price": 150.0}],
+        "shipping_address": "123 Main St, Austin, TX 78701",
+        "total": 300.0,
+    }
+    if idempotency_key is not None:
+        payload["idempotency_key"] = idempotency_key
+    return payload
+
+
+@override_settings(WEBHOOK_SECRET=None)
+class OrderWebhookClaimTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("orders:order_webhook")
+
+    def post(self, payload):
+        return self.client.post(
+            self.url, data=orjson.dumps(payload), content_type="application/json"
+        )
+
+    def test_idempotency_key_does_not_collide_with_order_id(self):
+        first = self.post(_order_payload("X"))
+        self.assertEqual(first.status_code, 201)
+
+        # An idempotency_key equal to another order's id must not resolve to that order
+        second = self.post(_order_payload("Y", idempotency_key="X"))
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.json()["order_id"], "Y")
+        self.assertTrue(Order.objects.filter(external_ref="Y").exists())
+
+    def test_replayed_idempotency_key_served_from_claim(self):
+        self.assertEqual(self.post(_order_payload("Z", idempotency_key="k-1")).status_code, 201)
+
+        # Different body (so the delivery cache misses), same idempotency_key
+        replay = self.post(_order_payload("Z-retry", idempotency_key="k-1"))
+        self.assertEqual(replay.status_code, 200)
+        self.assertEqual(replay.json()["order_id"], "Z")
+        self.assertFalse(Order.objects.filter(external_ref="Z-retry").exists())
+
+    def test_pending_claim_falls_through_to_database(self):
+        # Another worker holds the claim but hasn't resolved it yet
+        cache.set("ord:key:k-2", _CLAIM_PENDING)
+
+        response = self.post(_order_payload("P", idempotency_key="k-2"))
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Order.objects.filter(external_ref="P").exists())
+
+    def test_invalid_payload_returns_field_errors(self):
+        payload = _order_payload("E")
+        payload["items"][0]["quantity"] = 0
+
+        response = self.post(payload)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()["errors"]), ["items"])
+        self.assertIn("quantity", response.json()["errors"]["items"][0])
+
+    def test_malformed_json_returns_parse_error(self):
+        response = self.client.post(self.url, data=b"{", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()["detail"].startswith("JSON parse error"))
@@ -0,0 +1,75 @@
+"""
+Tests for the msgspec webhook schema (lax decoding, cleaning, error shape).
+"""
+import msgspec
+import orjson
+import pytest
+
+from orders.schemas import decode_order_webhook, schema_errors
+
+
+def _body(**overrides):
+    payload = {
+        "order_id": "SO-1",
+        "customer": {"name": "Jane Doe", "email": "jane@example.com"},
+        "items": [{"sku": "ABC123", "name": "Solar Panel", "quantity": 2, "unit_price": 150}],
+        "shipping_address": "123 Main St",
+        "total": 350,
+    }
+    payload.update(overrides)
+    return orjson.dumps(payload)
+
+
+def test_amounts_are_quantized_to_cents():
+    payload = decode_order_webhook(_body())
+    assert str(payload.total) == "350.00"
+    assert str(payload.items[0].unit_price) == "150.00"
+
+
+def test_strings_are_trimmed():
+    payload = decode_order_webhook(_body(order_id="  SO-1 "))
+    assert payload.order_id == "SO-1"
+
+
+@pytest.mark.parametrize("field", ["order_id", "shipping_address"])
+def test_blank_strings_are_rejected(field):
+    with pytest.raises(msgspec.ValidationError):
+        decode_order_webhook(_body(**{field: "   "}))
+
+
+def test_too_many_decimal_places_rejected():
+    with pytest.raises(msgspec.ValidationError):
+        decode_order_webhook(_body(total=1.234))
+
+
+def test_numeric_strings_and_numbers_accepted_like_drf():
+    item = {"sku": 123, "name": "Solar Panel", "quantity": "2", "unit_price": "150"}
+    payload = decode_order_webhook(_body(items=[item], order_id=10045))
+    assert payload.items[0].quantity == 2
+    assert payload.items[0].sku == "123"
+    assert payload.order_id == "10045"
+
+
+def _errors(body):
+    with pytest.raises(msgspec.ValidationError) as exc_info:
+        decode_order_webhook(body)
+    return schema_errors(exc_info.value)
+
+
+def test_schema_errors_are_keyed_by_field():
+    item = {"sku": "A", "name": "B", "quantity": 1, "unit_price": 1}
+    bad_item = {"sku": "A", "name": "B", "quantity": "two", "unit_price": 1}
+    errors = _errors(_body(items=[item, bad_item]))
+    assert errors == {"items": [{}, {"quantity": ["Expected `int`, got `str`"]}]}
+
+
+def test_schema_errors_for_missing_and_cleaned_fields():
+    assert list(_errors(orjson.dumps({"order_id": "SO-1"}))) == ["customer"]
+    errors = _errors(_body(customer={"name": "Jane", "email": "nope"}))
+    assert errors == {"customer": {"email": ["`email` must be a valid email address"]}}
+
+
+def test_quantity_capped_to_model_field():
+    item = {"sku": "A", "name": "B", "quantity": 2**31, "unit_price": 1}
+    with pytest.raises(msgspec.ValidationError):
+        decode_order_webhook(_body(items=[item]))
@@ -0,0 +1,28 @@
+"""
+Tests for ingress webhook signature verification.
+"""
+import hashlib
+
+from django.test import override_settings
+
+from orders.security import verify_request_signature
+
+BODY = b'{"order_id":"SO-1"}'
+
+
+def _blake2(key):
+    return hashlib.blake2b(BODY, key=key, digest_size=32).hexdigest()
+
+
+@override_settings(INTERNAL_WEBHOOK_SECRET=None)
+def test_blake2_signature_rejected_by_default():
+    # Even a MAC keyed with the HMAC secret must not be accepted when not opted in
+    assert not verify_request_signature(BODY, blake2_signature=_blake2(b"shared"), secret="shared")
+
+
+@override_settings(INTERNAL_WEBHOOK_SECRET="internal")
+def test_blake2_signature_uses_internal_secret():
+    assert verify_request_signature(BODY, blake2_signature=_blake2(b"internal"), secret="shared")
+    assert not verify_request_signature(
+        BODY, blake2_signature=_blake2(b"shared"), secret="shared"
+    )